@@ -1,6 +1,14 @@
 import os
 import sys
-import traci
+
+# USE_LIBSUMO=1 runs SUMO in-process through libsumo instead of the TraCI socket,
+# libsumo has no GUI so the sumo command must use the `sumo` binary, not `sumo-gui`
+USE_LIBSUMO = os.environ.get("USE_LIBSUMO") == "1"
+if USE_LIBSUMO:
+    import libsumo as traci
+else:
+    import traci
+import traci.constants as tc
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QComboBox, 
                             QLineEdit, QTableWidget, QTableWidgetItem, QGroupBox,
@@ -9,11 +17,17 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 import random
 import time
+import threading
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the numpy version below is used without it
+    njit = None
+
 # Add SUMO tools to path
 if 'SUMO_HOME' in os.environ:
     tools = os.path.join(os.environ['SUMO_HOME'], 'tools')
@@ -24,6 +38,79 @@ else:
 # Import sumo utilities
 from sumolib import checkBinary
 
+# Statistics table columns 1-13: (key in the global row, key in a road row, format)
+STATS_TABLE_COLUMNS = (
+    ('total_queue', 'current_queue', '%d'),
+    ('total_waiting_time', 'current_waiting_time', '%.1fs'),
+    ('total_vehicles', 'current_vehicles', '%d'),
+    ('total_length', 'current_length', '%.1fm'),
+    ('total_queue', 'total_queue', '%d'),
+    ('total_waiting_time', 'total_waiting_time', '%.1fs'),
+    ('total_vehicles', 'total_vehicles', '%d'),
+    ('total_length', 'total_length', '%.1fm'),
+    ('max_queue', 'max_queue', '%d'),
+    ('max_waiting_time', 'max_waiting_time', '%.1fs'),
+    ('average_queue', 'average_queue', '%.1f'),
+    ('average_waiting_time', 'average_waiting_time', '%.1fs'),
+    ('average_length', 'average_length', '%.1fm'),
+)
+STATS_TABLE_ROADS = ('N2TL', 'S2TL', 'E2TL', 'W2TL')
+_STATS_TABLE_FORMATS = np.array([fmt for _, _, fmt in STATS_TABLE_COLUMNS])
+
+def format_stats_table(stats):
+    """Texts of the statistics table rows (global row first, then one per road) in one numpy call"""
+    grid = np.empty((1 + len(STATS_TABLE_ROADS), len(STATS_TABLE_COLUMNS)))
+    grid[0] = [stats[key] for key, _, _ in STATS_TABLE_COLUMNS]
+    for row, road_id in enumerate(STATS_TABLE_ROADS, 1):
+        road_stats = stats['road_stats'][road_id]
+        grid[row] = [road_stats[key] for _, key, _ in STATS_TABLE_COLUMNS]
+    return np.char.mod(_STATS_TABLE_FORMATS, grid).tolist()
+
+def stats_plot_values(stats):
+    """Current queue, waiting time and length of each road as a (road, series) float32 array"""
+    road_stats = stats['road_stats']
+    return np.array([(road_stats[road]['current_queue'],
+                      road_stats[road]['current_waiting_time'],
+                      road_stats[road]['current_length']) for road in STATS_TABLE_ROADS], dtype=np.float32)
+
+_ROAD_INDEX = {road: i for i, road in enumerate(STATS_TABLE_ROADS)}
+
+# Subscribed once, every step then reads all values in one call per domain
+EDGE_VARIABLES = (tc.LAST_STEP_VEHICLE_NUMBER, tc.LAST_STEP_HALTING_NUMBER, tc.LAST_STEP_MEAN_SPEED)
+VEHICLE_VARIABLES = (tc.VAR_ROUTE_ID, tc.VAR_ROAD_ID, tc.VAR_LANE_INDEX, tc.VAR_SPEED,
+                     tc.VAR_WAITING_TIME, tc.VAR_TYPE)
+
+if njit is not None:
+    @njit(cache=True)
+    def _aggregate_roads(road_idx, waits, speeds, lengths, n_roads):
+        """Queue, waiting time, vehicles and length of each road, the last row counts every vehicle"""
+        out = np.zeros((n_roads + 1, 4))
+        for i in range(waits.size):
+            queued = 1.0 if speeds[i] < 0.1 else 0.0
+            r = road_idx[i]
+            if r >= 0:
+                out[r, 0] += queued
+                out[r, 1] += waits[i]
+                out[r, 2] += 1
+                out[r, 3] += lengths[i]
+            out[n_roads, 0] += queued
+            out[n_roads, 1] += waits[i]
+            out[n_roads, 2] += 1
+            out[n_roads, 3] += lengths[i]
+        return out
+else:
+    def _aggregate_roads(road_idx, waits, speeds, lengths, n_roads):
+        """Queue, waiting time, vehicles and length of each road, the last row counts every vehicle"""
+        # Vehicles on no statistics road go to an extra bin that only the global row adds up
+        idx = np.where(road_idx >= 0, road_idx, n_roads + 1).astype(np.intp)
+        out = np.empty((n_roads + 2, 4))
+        out[:, 0] = np.bincount(idx, weights=(speeds < 0.1).astype(np.float64), minlength=n_roads + 2)
+        out[:, 1] = np.bincount(idx, weights=waits, minlength=n_roads + 2)
+        out[:, 2] = np.bincount(idx, minlength=n_roads + 2)
+        out[:, 3] = np.bincount(idx, weights=lengths, minlength=n_roads + 2)
+        out[n_roads] = out.sum(axis=0)
+        return out[:n_roads + 1]
+
 class SimulationThread(QThread):
     step_updated = pyqtSignal(int)
     vehicle_updated = pyqtSignal(dict)
@@ -47,6 +134,20 @@ class SimulationThread(QThread):
         self.last_spawn_step = 0
         self._sumo_cmd = sumo_cmd
         
+        # Latest UI data, written by this thread and taken by the window's UI timer
+        self._state_lock = threading.Lock()
+        self._latest_state = None
+        
+        # Set by the window, the removal itself runs on this thread between two steps
+        self._remove_all_requested = threading.Event()
+        
+        # Current queue, waiting time and length per road, a new array every step
+        self._plot_values = np.zeros((len(STATS_TABLE_ROADS), 3), dtype=np.float32)
+        
+        # Subscription results of the current step
+        self._edge_results = {}
+        self._vehicle_results = {}
+        
         # Road IDs
         self.roads = {
             'north': 'N2TL',
@@ -118,6 +219,8 @@ class SimulationThread(QThread):
             if self._sumo_cmd and not traci.isLoaded():
                 traci.start(self._sumo_cmd)
                 time.sleep(1)  # Wait for traci to be ready
+            if traci.isLoaded():
+                self._subscribe()
             
             # Define phase durations (in seconds)
             phase_durations = {
@@ -135,8 +238,12 @@ class SimulationThread(QThread):
             
             while self.running:
                 step_duration = 1.0 / self.speed
+                if self._remove_all_requested.is_set():
+                    self._remove_all_requested.clear()
+                    self._remove_all_vehicles()
                 traci.simulationStep()
                 self.step += 1
+                self._read_subscriptions()
                 
                 # Check if phase changed
                 try:
@@ -167,11 +274,18 @@ class SimulationThread(QThread):
                 # Update cumulative statistics
                 self.update_cumulative_statistics()
                 
-                # Emit signals
-                self.step_updated.emit(self.step)
-                self.vehicle_updated.emit(self.get_vehicle_data())
-                self.stats_updated.emit(self.get_statistics())
-                self.cumulative_stats_updated.emit(self.get_cumulative_statistics())
+                # Publish the latest data, the window pulls it at its own refresh rate.
+                # The table texts are formatted here so the GUI thread only sets them,
+                # the plot gets one (road, series) array instead of the nested statistics.
+                state = {
+                    'step': self.step,
+                    'vehicles': self.get_vehicle_data(),
+                    'stats': self.get_statistics(),
+                    'stats_text': format_stats_table(self.get_cumulative_statistics()),
+                    'plot_values': self._plot_values
+                }
+                with self._state_lock:
+                    self._latest_state = state
                 
                 time.sleep(step_duration)
                 
@@ -181,27 +295,57 @@ class SimulationThread(QThread):
             # Don't close traci here - let the main simulation handle that
             pass
     
+    def request_remove_all(self):
+        """Ask the simulation loop to remove every vehicle before its next step"""
+        self._remove_all_requested.set()
+    
+    def _remove_all_vehicles(self):
+        try:
+            # One id list, then all removals back to back with no step in between
+            for vid in list(self._vehicle_results):
+                traci.vehicle.remove(vid)
+        except Exception as e:
+            print(f"Error removing vehicles: {e}")
+    
+    def _subscribe(self):
+        """Subscribe the statistics roads and the vehicles already in the simulation"""
+        for road in STATS_TABLE_ROADS:
+            traci.edge.subscribe(road, EDGE_VARIABLES)
+        for vid in traci.vehicle.getIDList():
+            traci.vehicle.subscribe(vid, VEHICLE_VARIABLES)
+    
+    def _read_subscriptions(self):
+        # Arrived vehicles drop out of the subscriptions by themselves, only new ones are added
+        for vid in traci.simulation.getDepartedIDList():
+            traci.vehicle.subscribe(vid, VEHICLE_VARIABLES)
+        self._edge_results = traci.edge.getAllSubscriptionResults()
+        self._vehicle_results = traci.vehicle.getAllSubscriptionResults()
+    
+    def take_latest_state(self):
+        """Return the data published since the last call, None if there is nothing new"""
+        with self._state_lock:
+            state = self._latest_state
+            self._latest_state = None
+        return state
+    
     def get_vehicle_data(self):
-        if 'traci' not in sys.modules or not traci.isLoaded():
+        if not traci.isLoaded():
             return {}
         
         vehicles = {}
-        for vid in traci.vehicle.getIDList():
-            try:
-                vehicles[vid] = {
-                    'route': traci.vehicle.getRouteID(vid),
-                    'road': traci.vehicle.getRoadID(vid),
-                    'lane': traci.vehicle.getLaneIndex(vid),
-                    'speed': round(traci.vehicle.getSpeed(vid), 1),
-                    'waiting': round(traci.vehicle.getWaitingTime(vid), 1)
-                }
-            except Exception as e:
-                print(f"Error getting vehicle data for {vid}: {e}")
+        for vid, data in self._vehicle_results.items():
+            vehicles[vid] = {
+                'route': data[tc.VAR_ROUTE_ID],
+                'road': data[tc.VAR_ROAD_ID],
+                'lane': data[tc.VAR_LANE_INDEX],
+                'speed': round(data[tc.VAR_SPEED], 1),
+                'waiting': round(data[tc.VAR_WAITING_TIME], 1)
+            }
         
         return vehicles
     
     def get_statistics(self):
-        if 'traci' not in sys.modules or not traci.isLoaded():
+        if not traci.isLoaded():
             return {}
         
         stats = {}
@@ -213,10 +357,13 @@ class SimulationThread(QThread):
         }
         
         for direction, edge in directions.items():
+            edge_data = self._edge_results.get(edge)
+            if edge_data is None:
+                continue
             stats[direction] = {
-                'count': traci.edge.getLastStepVehicleNumber(edge),
-                'queue': traci.edge.getLastStepHaltingNumber(edge),
-                'speed': max(0, traci.edge.getLastStepMeanSpeed(edge))
+                'count': edge_data[tc.LAST_STEP_VEHICLE_NUMBER],
+                'queue': edge_data[tc.LAST_STEP_HALTING_NUMBER],
+                'speed': max(0, edge_data[tc.LAST_STEP_MEAN_SPEED])
             }
         
         try:
@@ -297,66 +444,45 @@ class SimulationThread(QThread):
             print(f"Error spawning random vehicle: {e}")
     
     def update_cumulative_statistics(self):
-        if 'traci' not in sys.modules or not traci.isLoaded():
+        if not traci.isLoaded():
             return
         
         try:
-            # Reset current road statistics
-            for road in self.roads.values():
-                self.road_stats[road]['current_queue'] = 0
-                self.road_stats[road]['current_waiting_time'] = 0
-                self.road_stats[road]['current_vehicles'] = 0
-                self.road_stats[road]['current_length'] = 0
+            # One row per vehicle: road index (-1 off the statistics roads), waiting time, speed, length
+            vehicles = self._vehicle_results
+            rows = [(_ROAD_INDEX.get(v[tc.VAR_ROAD_ID], -1),
+                     v[tc.VAR_WAITING_TIME],
+                     v[tc.VAR_SPEED],
+                     self.vehicle_lengths.get(v[tc.VAR_TYPE], 0.0)) for v in vehicles.values()]
+            data = np.array(rows, dtype=np.float64).reshape(-1, 4)
             
-            # Get current vehicles
-            vehicles = traci.vehicle.getIDList()
-            current_queue = 0
-            current_waiting_time = 0
-            current_length = 0
+            # Reduce all vehicles at once, one row per road and a last row for the whole intersection
+            current = _aggregate_roads(data[:, 0].astype(np.int32), data[:, 1], data[:, 2], data[:, 3],
+                                       len(STATS_TABLE_ROADS))
             
-            for vid in vehicles:
-                try:
-                    # Get vehicle info
-                    road_id = traci.vehicle.getRoadID(vid)
-                    waiting_time = traci.vehicle.getWaitingTime(vid)
-                    vehicle_type = traci.vehicle.getTypeID(vid)
-                    speed = traci.vehicle.getSpeed(vid)
-                    
-                    # Update road-specific statistics
-                    if road_id in self.road_stats:
-                        self.road_stats[road_id]['current_vehicles'] += 1
-                        self.road_stats[road_id]['current_waiting_time'] += waiting_time
-                        if speed < 0.1:
-                            self.road_stats[road_id]['current_queue'] += 1
-                        if vehicle_type in self.vehicle_lengths:
-                            self.road_stats[road_id]['current_length'] += self.vehicle_lengths[vehicle_type]
-                    
-                    # Update global statistics
-                    if speed < 0.1:
-                        current_queue += 1
-                    current_waiting_time += waiting_time
-                    if vehicle_type in self.vehicle_lengths:
-                        current_length += self.vehicle_lengths[vehicle_type]
-                
-                except Exception as e:
-                    print(f"Error processing vehicle {vid}: {e}")
+            self._plot_values = current[:-1, [0, 1, 3]].astype(np.float32)
             
-            # Update cumulative road statistics
-            for road in self.roads.values():
+            # Update current and cumulative road statistics
+            for road, (queue, waiting_time, count, length) in zip(STATS_TABLE_ROADS, current.tolist()):
                 stats = self.road_stats[road]
+                stats['current_queue'] = int(queue)
+                stats['current_waiting_time'] = waiting_time
+                stats['current_vehicles'] = int(count)
+                stats['current_length'] = length
                 stats['total_queue'] += stats['current_queue']
-                stats['total_waiting_time'] += stats['current_waiting_time']
+                stats['total_waiting_time'] += waiting_time
                 stats['total_vehicles'] += stats['current_vehicles']
-                stats['total_length'] += stats['current_length']
+                stats['total_length'] += length
                 stats['max_queue'] = max(stats['max_queue'], stats['current_queue'])
-                stats['max_waiting_time'] = max(stats['max_waiting_time'], stats['current_waiting_time'])
+                stats['max_waiting_time'] = max(stats['max_waiting_time'], waiting_time)
             
             # Update global statistics
-            self.total_queue += current_queue
+            current_queue, current_waiting_time, _, current_length = current[-1].tolist()
+            self.total_queue += int(current_queue)
             self.total_waiting_time += current_waiting_time
             self.total_length += current_length
             self.total_vehicles += len(vehicles)
-            self.max_queue = max(self.max_queue, current_queue)
+            self.max_queue = max(self.max_queue, int(current_queue))
             self.max_waiting_time = max(self.max_waiting_time, current_waiting_time)
             
         except Exception as e:
@@ -3,13 +3,30 @@ import json
 import time
 import socket
 import threading
+import queue
 import os
 import numpy as np
 import traci
 import logging
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, requests serializes with the json module without it
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+def _post_json(url, payload, timeout):
+    """POST a JSON payload, serialized with orjson when it is installed"""
+    if orjson is None:
+        return requests.post(url, json=payload, timeout=timeout)
+    return requests.post(
+        url,
+        data=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+        headers={'Content-Type': 'application/json'},
+        timeout=timeout
+    )
+
 class AgentCommunicatorTraining:
     def __init__(self, server_url, agent_id=None, mapping_config=None, env_file_path=None):
         """
@@ -373,6 +390,9 @@ class AgentCommunicatorTraining:
             print(f"Error extracting environment information: {e}")
             return None
 
+# Maximum number of states waiting to be synced by AgentCommunicatorTesting
+STATE_QUEUE_SIZE = 1000
+
 class AgentCommunicatorTesting:
     def __init__(self, server_url, agent_id=None, mapping_config=None, env_file_path=None):
         self.server_url = server_url
@@ -394,8 +414,16 @@ class AgentCommunicatorTesting:
         self.topology_sent = False
         self.last_sync = 0
         self.sync_interval = 30  # seconds
+        self.sync_timing_interval = 10  # seconds
+        # Latest sync timing polled by the background thread, taken with take_sync_timing()
+        self.latest_sync_timing = None
+        self._timing_lock = threading.Lock()
+        # the background thread and the final sync at the end of a run may sync at the same time
+        self._sync_lock = threading.Lock()
         self.background_thread = None
         self.running = False
+        # States waiting for the background thread, the oldest are dropped when full
+        self._state_queue = queue.Queue(maxsize=STATE_QUEUE_SIZE)
         self.backup_dir = f'agent_{self.agent_id}_data'
         os.makedirs(self.backup_dir, exist_ok=True)
         print(f"Testing communicator initialized with ID: {self.agent_id}")
@@ -413,21 +441,74 @@ class AgentCommunicatorTesting:
             self.background_thread.join(timeout=5)
 
     def _sync_loop(self):
+        next_sync = next_timing = time.monotonic()
         while self.running:
-            try:
-                self.sync_with_server()
-            except Exception as e:
-                print(f"Error in background sync: {e}")
-                self._backup_data()
-            time.sleep(self.sync_interval)
+            now = time.monotonic()
+            if now >= next_timing:
+                sync_data = self.get_sync_timing()
+                if sync_data:
+                    with self._timing_lock:
+                        self.latest_sync_timing = sync_data
+                next_timing = now + self.sync_timing_interval
+            if now >= next_sync:
+                try:
+                    self.sync_with_server()
+                except Exception as e:
+                    print(f"Error in background sync: {e}")
+                    self._backup_data()
+                next_sync = now + self.sync_interval
+            time.sleep(max(0, min(next_sync, next_timing) - time.monotonic()))
+
+    def take_sync_timing(self):
+        """Return the sync timing polled since the last call, None if there is none, without blocking"""
+        with self._timing_lock:
+            sync_data, self.latest_sync_timing = self.latest_sync_timing, None
+        return sync_data
 
     def _backup_data(self):
         backup_file = os.path.join(self.backup_dir, f'backup_{int(time.time())}.json')
         with open(backup_file, 'w') as f:
             json.dump(self.data, f)
 
+    def _drain_state_queue(self):
+        """
+        Move queued states into the data to send. Only plain state updates are coalesced,
+        keeping the latest per step unless that step already has one with traffic data;
+        updates with traffic data, such as vehicle transfers, are always kept
+        """
+        states = []
+        plain_index = {}
+        steps_with_data = set()
+        while True:
+            try:
+                plain, state_data = self._state_queue.get_nowait()
+            except queue.Empty:
+                break
+            step = state_data['step']
+            if not plain:
+                steps_with_data.add(step)
+                states.append(state_data)
+            elif step in steps_with_data:
+                continue
+            elif step in plain_index:
+                states[plain_index[step]] = state_data
+            else:
+                plain_index[step] = len(states)
+                states.append(state_data)
+        if not states:
+            return
+        self.data['states'].extend(states)
+        self.current_data['states'].extend(states)
+        if len(self.data['states']) > 100:
+            self.data['states'] = self.data['states'][-100:]
+
     def sync_with_server(self):
+        with self._sync_lock:
+            return self._sync_with_server()
+
+    def _sync_with_server(self):
         try:
+            self._drain_state_queue()
             send_data = self.current_data.copy()
             if not self.topology_sent:
                 topology_data = {}
@@ -442,11 +523,7 @@ class AgentCommunicatorTesting:
                     send_data['topology'] = topology_data
             if len(send_data['states']) > 0 or not self.topology_sent:
                 print("[TEST] Sending current data to server:", send_data)
-                response = requests.post(
-                    f"{self.server_url}/api/update",
-                    json=send_data,
-                    timeout=10
-                )
+                response = _post_json(f"{self.server_url}/api/update", send_data, timeout=10)
                 if response.status_code == 200:
                     print(f"[TEST] Successfully synced with server.")
                     self.last_sync = time.time()
@@ -465,9 +542,8 @@ class AgentCommunicatorTesting:
             print(f"[TEST] Connection error during sync: {e}")
             return False
 
-    def send_state(self, state, step, traffic_data=None):
-        if not 'states' in self.data:
-            self.data['states'] = []
+    def collect_avg_speeds(self):
+        """Average speed per edge from SUMO, None if SUMO could not be queried"""
         avg_speeds = {}
         try:
             traffic_speeds = {}
@@ -480,26 +556,40 @@ class AgentCommunicatorTesting:
             for edge, speeds in traffic_speeds.items():
                 if speeds:
                     avg_speeds[edge] = sum(speeds) / len(speeds)
-            if traffic_data is None:
-                traffic_data = {}
-            traffic_data['avg_speed'] = avg_speeds
             logger.info(f"[TEST] Calculated average speeds: {avg_speeds}")
         except Exception as e:
             logger.error(f"[TEST] Warning: Could not get traffic speeds: {e}")
+            return None
+        return avg_speeds
+
+    def send_state(self, state, step, traffic_data=None, avg_speeds=None):
+        """
+        Queue a state update for the background sync thread without waiting on the server,
+        avg_speeds can be collected beforehand with collect_avg_speeds() so that this call
+        does not need to query SUMO. traffic_data is queued as is, so pass a new dict each call
+        """
+        # plain state updates without traffic data may be coalesced per step before syncing
+        plain = traffic_data is None
+        if avg_speeds is None:
+            avg_speeds = self.collect_avg_speeds()
+        if avg_speeds:
+            traffic_data = {**(traffic_data or {}), 'avg_speed': avg_speeds}
         state_data = {
             'step': step,
             'state': state.tolist() if isinstance(state, np.ndarray) else state,
             'timestamp': time.time(),
             'traffic_data': traffic_data or {},
-            'speeds': avg_speeds
+            'speeds': avg_speeds or {}
         }
-        self.data['states'].append(state_data)
-        self.current_data['states'].append(state_data)
-        if len(self.data['states']) > 100:
-            self.data['states'] = self.data['states'][-100:]
-        current_time = time.time()
-        if current_time - self.last_sync >= self.sync_interval:
-            self.sync_with_server()
+        while True:
+            try:
+                self._state_queue.put_nowait((plain, state_data))
+                return
+            except queue.Full:
+                try:
+                    self._state_queue.get_nowait()
+                except queue.Empty:
+                    pass
 
     def get_sync_timing(self):
         try:
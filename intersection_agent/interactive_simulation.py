@@ -1,15 +1,30 @@
-import traci
+import os
+
+# USE_LIBSUMO=1 runs SUMO in-process through libsumo instead of the TraCI socket,
+# libsumo has no GUI so the sumo command must use the `sumo` binary, not `sumo-gui`
+if os.environ.get("USE_LIBSUMO") == "1":
+    import libsumo as traci
+    TraCIException = traci.TraCIException
+    FatalTraCIError = getattr(traci, "FatalTraCIError", traci.TraCIException)
+else:
+    import traci
+    from traci.exceptions import TraCIException, FatalTraCIError
+import traci.constants as tc
 import numpy as np
 import timeit
-import os
 import time
 import random
+import queue
+import threading
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QGroupBox, QSplitter
-from PyQt5.QtCore import QThread, pyqtSignal, QObject
+from PyQt5.QtCore import QThread, pyqtSignal, QObject, QTimer
 from agent_communicator import AgentCommunicatorTesting
-from main_window import MainWindow
-from matplotlib.backends.backend_qt5agg import FigureCanvas
-from matplotlib.figure import Figure
+from main_window import MainWindow, DISTRIBUTION_PRESETS
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the numpy version below is used without it
+    njit = None
 
 # phase codes based on environment.net.xml
 PHASE_NS_GREEN = 0  # action 0 code 00
@@ -21,6 +36,70 @@ PHASE_EW_YELLOW = 5
 PHASE_EWL_GREEN = 6  # action 3 code 11
 PHASE_EWL_YELLOW = 7
 
+# initial number of waiting time slots, doubled when more vehicles are tracked at the same time
+MAX_VEHICLES = 4096
+
+# incoming roads in the order of the statistics table
+STAT_ROADS = ("N2TL", "S2TL", "E2TL", "W2TL")
+_ROAD_INDEX = {road_id: i for i, road_id in enumerate(STAT_ROADS)}
+
+# vehicle variables subscribed for every vehicle when it departs
+VEHICLE_VARIABLES = [tc.VAR_POSITION, tc.VAR_ROUTE_ID, tc.VAR_ROAD_ID,
+                     tc.VAR_LANE_INDEX, tc.VAR_SPEED, tc.VAR_WAITING_TIME,
+                     tc.VAR_ACCUMULATED_WAITING_TIME, tc.VAR_LANE_ID, tc.VAR_LANEPOSITION]
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _fill_state(groups, cells, out):
+        """Mark the occupied cells, each lane group has 10 cells"""
+        for i in range(groups.size):
+            g = groups[i]
+            if g >= 0:
+                pos = g * 10 + min(cells[i], 9)
+                if pos < out.size:
+                    out[pos] = 1
+else:
+    def _fill_state(groups, cells, out):
+        """Mark the occupied cells, each lane group has 10 cells"""
+        positions = groups * 10 + np.minimum(cells, 9)
+        mask = (groups >= 0) & (positions < out.size)
+        out[positions[mask]] = 1
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _road_reduce(waits, road_idx, n_roads):
+        """Total, maximum and mean waiting time of each road, road_idx -1 is not counted"""
+        total = np.zeros(n_roads)
+        mx = np.zeros(n_roads)
+        count = np.zeros(n_roads)
+        for i in range(waits.size):
+            r = road_idx[i]
+            if r >= 0:
+                total[r] += waits[i]
+                count[r] += 1
+                if waits[i] > mx[r]:
+                    mx[r] = waits[i]
+        mean = np.zeros(n_roads)
+        for r in range(n_roads):
+            if count[r] > 0:
+                mean[r] = total[r] / count[r]
+        return total, mx, mean
+else:
+    def _road_reduce(waits, road_idx, n_roads):
+        """Total, maximum and mean waiting time of each road, road_idx -1 is not counted"""
+        mask = road_idx >= 0
+        idx = road_idx[mask].astype(np.intp)
+        w = waits[mask].astype(np.float64)
+        total = np.bincount(idx, weights=w, minlength=n_roads)
+        count = np.bincount(idx, minlength=n_roads)
+        mx = np.zeros(n_roads)
+        np.maximum.at(mx, idx, w)
+        mean = np.divide(total, count, out=np.zeros(n_roads), where=count > 0)
+        return total, mx, mean
+
+
 class InteractiveSimulation(QObject):
     # Define signals
     step_updated = pyqtSignal(int)
@@ -30,7 +109,7 @@ class InteractiveSimulation(QObject):
 
     def __init__(self, Model, sumo_cmd, max_steps, green_duration, yellow_duration,
                  num_states, num_actions, server_url=None, agent_id=None,
-                 mapping_config=None, env_file_path=None):
+                 mapping_config=None, env_file_path=None, batch_steps=1):
         # Initialize QObject
         super().__init__()
 
@@ -42,13 +121,25 @@ class InteractiveSimulation(QObject):
         self._num_states = num_states
         self._num_actions = num_actions
         self._reward_episode = []
-        self._queue_length_episode = []
+        self._queue_arr = np.empty(4096, dtype=np.int32)  # Queue length of every step, grown on demand
+        self._queue_n = 0
+        self._q_sum = 0  # Running total, maximum and count of the queue lengths
+        self._q_max = 0
+        self._q_count = 0
         self._vehicle_counter = 0
+        self._rng = np.random.default_rng()
 
         # Add vehicle tracking
         self._active_vehicles = set()  # Track vehicles currently in simulation
         self._exited_vehicles = {}  # Track vehicles that have exited and their destinations
         self._incoming_vehicles = []  # Track vehicles that should be spawned
+        self._vehicle_cache = {}  # Type and route of the vehicles we spawned, by vehicle id
+        self._sumo_running = False  # Set once SUMO is started, checked instead of traci.isLoaded() on every tick
+        self._current_ids = ()  # Vehicle ids of the last simulation step
+        self._edge_sub = {}  # Edge subscription results of the last simulation step
+        self._vehicle_results = {}  # Vehicle subscription results of the last simulation step
+        self._zero_state = np.zeros(self._num_states, dtype=np.uint8)  # Shared state of an empty intersection, read only
+        self._zero_state.flags.writeable = False
 
         # Define phase durations (in seconds)
         self.phase_durations = {
@@ -77,6 +168,13 @@ class InteractiveSimulation(QObject):
         self.max_count = 8
         self.last_spawn_step = 0
 
+        # Maximum UI refresh rate (Hz), simulation steps in between are not sent to the window
+        self.max_redraw_rate = 20
+        self._ui_refresh_every = 5  # Steps between two step_updated signals inside _simulate
+        self._batch_steps = max(1, int(batch_steps))  # Steps per simulationStep call when SUMO runs without GUI
+        self._headless = 'gui' not in os.path.basename(str(sumo_cmd[0]))
+        self._last_emit_ts = 0.0
+
         # Road IDs and their connections
         self.roads = {
             'north': 'N2TL',
@@ -85,6 +183,20 @@ class InteractiveSimulation(QObject):
             'west': 'W2TL'
         }
 
+        # Lane ID -> lane group lookup used to build the state vector
+        # x2TL_3 are the "turn left only" lanes
+        self._lane_to_group = {}
+        for group, road in enumerate(["W2TL", "N2TL", "E2TL", "S2TL"]):
+            for lane in range(3):
+                self._lane_to_group[f"{road}_{lane}"] = group * 2
+            self._lane_to_group[f"{road}_3"] = group * 2 + 1
+
+        # Static road endpoints, filled once SUMO is running
+        self._road_endpoints = {}
+
+        # Routes for incoming vehicles keyed by (entry road, destination edge)
+        self._route_pool = {}
+
         # Map road IDs to connected intersections
         self.road_connections = {
             'N2TL': 'agent2',  # North road connects to agent2
@@ -118,6 +230,7 @@ class InteractiveSimulation(QObject):
             "E_N": 15, "E_S": 5, "E_W": 10,
             "S_N": 15, "S_E": 5, "S_W": 5
         }
+        self._update_sampling_tables()
 
         # Initialize server communication if URL is provided
         self._server_url = server_url
@@ -134,6 +247,15 @@ class InteractiveSimulation(QObject):
                 "mode": "interactive_testing"
             })
             self._communicator.start_background_sync()
+
+            # Coordination requests run on a worker thread so HTTP latency never stalls a step,
+            # state updates go straight to the communicator's own queue
+            self._network_queue = queue.Queue(maxsize=64)
+            self._coordination_lock = threading.Lock()
+            self._coordination_responses = []
+            self._coordination_pending = threading.Event()
+            self._network_thread = threading.Thread(target=self._network_loop, daemon=True)
+            self._network_thread.start()
         else:
             self._communicator = None
 
@@ -145,7 +267,7 @@ class InteractiveSimulation(QObject):
     @property
     def queue_length_episode(self):
         """Get the queue length episode data"""
-        return self._queue_length_episode
+        return self._queue_arr[:self._queue_n]
 
     def run(self, episode):
         """
@@ -158,7 +280,8 @@ class InteractiveSimulation(QObject):
 
         # Reset episode arrays
         self._reward_episode = []
-        self._queue_length_episode = []
+        self._queue_n = 0
+        self._q_sum = self._q_max = self._q_count = 0
 
         # Create and show the main window
         app = QApplication.instance()
@@ -166,6 +289,12 @@ class InteractiveSimulation(QObject):
             app = QApplication([])
         self.window = MainWindow()
 
+        # Drive the simulation from the Qt event loop, the timer only runs while the simulation is active
+        self._app = app
+        self._step_timer = QTimer()
+        self._step_timer.setInterval(0)
+        self._step_timer.timeout.connect(self._do_step)
+
         # Connect signals to window slots
         self.step_updated.connect(self.window.update_step)
         self.vehicle_updated.connect(self.window.update_vehicles)
@@ -186,9 +315,9 @@ class InteractiveSimulation(QObject):
 
         # Initialize simulation variables
         self._step = 0
-        self._waiting_times = {}
-        old_total_wait = 0
-        old_action = -1  # dummy init
+        self._reset_waiting_times()
+        self._old_total_wait = 0
+        self._old_action = -1  # dummy init
 
         # Get initial sync timing if available
         if self._communicator:
@@ -196,110 +325,15 @@ class InteractiveSimulation(QObject):
             if sync_data:
                 self._adjust_timing(sync_data)
 
-        # Main simulation loop
-        while self._step < self._max_steps:
-            # Process Qt events to keep UI responsive
-            app.processEvents()
-
-            # Only run simulation if it's active
-            if self.running and traci.isLoaded():
-                try:
-                    # Handle automatic spawning with random intervals
-                    if self.auto_spawn:
-                        if self.spawn_interval_random:
-                            current_interval = random.randint(self.min_interval, self.max_interval)
-                        else:
-                            current_interval = self.spawn_interval
-
-                        if (self._step - self.last_spawn_step) >= current_interval:
-                            self.last_spawn_step = self._step
-                            # Calculate count before using it
-                            if self.spawn_count_random:
-                                count = random.randint(self.min_count, self.max_count)
-                            else:
-                                count = self.spawn_count
-                            
-                            # Spawn vehicles
-                            for _ in range(count):
-                                self.spawn_random_vehicle()
-                            print(f"Spawned {count} vehicles")
-                    else:
-                        print("Auto spawn is disabled")
-
-                    # Get current state of the intersection
-                    current_state = self._get_state()
-
-                    # Calculate reward of previous action
-                    current_total_wait = self._collect_waiting_times()
-                    reward = old_total_wait - current_total_wait
-
-                    # Choose the light phase to activate
-                    action = self._choose_action(current_state)
-
-                    # If the chosen phase is different from the last phase, activate the yellow phase
-                    if self._step != 0 and old_action != action:
-                        self._set_yellow_phase(old_action)
-                        self._simulate(self._yellow_duration)
-
-                    # Execute the green phase
-                    self._set_green_phase(action)
-                    self._simulate(self._green_duration)
-
-                    # Save variables for next step
-                    old_action = action
-                    old_total_wait = current_total_wait
-
-                    # Add reward to episode total
-                    self._reward_episode.append(reward)
-
-                    # Update UI with current data
-                    self.step_updated.emit(self._step)
-                    self.vehicle_updated.emit(self.get_vehicle_data())
-                    self.stats_updated.emit(self.get_statistics())
-                    self.cumulative_stats_updated.emit(self.get_cumulative_statistics())
-
-                    # Track vehicles and handle incoming vehicles
-                    self._track_vehicles()
-                    self._check_incoming_vehicles()
-
-                    # Update server with state and get new sync timing
-                    if self._communicator:
-                        # Send current state
-                        self._communicator.send_state(current_state, self._step, {
-                            'queue_length': self._get_queue_length(),
-                            'current_phase': traci.trafficlight.getPhase("TL"),
-                            'incoming_vehicles': {
-                                'N': traci.edge.getLastStepVehicleNumber("N2TL"),
-                                'S': traci.edge.getLastStepVehicleNumber("S2TL"),
-                                'E': traci.edge.getLastStepVehicleNumber("E2TL"),
-                                'W': traci.edge.getLastStepVehicleNumber("W2TL")
-                            },
-                            'avg_speed': {
-                                'N': traci.edge.getLastStepMeanSpeed("N2TL"),
-                                'S': traci.edge.getLastStepMeanSpeed("S2TL"),
-                                'E': traci.edge.getLastStepMeanSpeed("E2TL"),
-                                'W': traci.edge.getLastStepMeanSpeed("W2TL")
-                            }
-                        })
-
-                        # Get new sync timing periodically
-                        if self._step % 60 == 0:  # Check for new sync timing every minute
-                            sync_data = self._communicator.get_sync_timing()
-                            if sync_data:
-                                self._adjust_timing(sync_data)
-
-                except traci.exceptions.FatalTraCIError as e:
-                    print(f"TraCI error: {e}")
-                    break
-                except Exception as e:
-                    print(f"Error in simulation loop: {e}")
-                    break
-
-            # Small delay to prevent CPU overuse
-            time.sleep(0.01)
+        # Run the simulation loop from the Qt event loop until the last step
+        if self.running:
+            self._step_timer.start()
+        app.exec_()
+        self._step_timer.stop()
 
         # End simulation
         self.running = False
+        self._sumo_running = False
         if traci.isLoaded():
             traci.close()
         simulation_time = round(timeit.default_timer() - start_time, 1)
@@ -307,8 +341,9 @@ class InteractiveSimulation(QObject):
         # Report final results to server
         if self._communicator:
             total_reward = np.sum(self._reward_episode)
-            avg_queue_length = np.mean(self._queue_length_episode) if self._queue_length_episode else 0
-            total_waiting_time = np.sum(self._queue_length_episode) if self._queue_length_episode else 0
+            queue_lengths = self._queue_arr[:self._queue_n]
+            avg_queue_length = queue_lengths.mean() if self._queue_n else 0
+            total_waiting_time = queue_lengths.sum() if self._queue_n else 0
 
             self._communicator.update_episode_result(
                 episode=episode,
@@ -320,6 +355,155 @@ class InteractiveSimulation(QObject):
 
         return simulation_time
 
+    def _do_step(self):
+        """
+        Run one iteration of the simulation loop, called by the step timer
+        """
+        if self._step >= self._max_steps:
+            self._stop_stepping()
+            return
+
+        # Only run simulation if it's active
+        if not self.running or not self._sumo_running:
+            return
+
+        try:
+            # Handle automatic spawning with random intervals
+            if self.auto_spawn:
+                if self.spawn_interval_random:
+                    current_interval = random.randint(self.min_interval, self.max_interval)
+                else:
+                    current_interval = self.spawn_interval
+
+                if (self._step - self.last_spawn_step) >= current_interval:
+                    self.last_spawn_step = self._step
+                    # Calculate count before using it
+                    if self.spawn_count_random:
+                        count = random.randint(self.min_count, self.max_count)
+                    else:
+                        count = self.spawn_count
+                    
+                    # Spawn vehicles
+                    self.spawn_random_vehicle(count)
+                    print(f"Spawned {count} vehicles")
+            else:
+                print("Auto spawn is disabled")
+
+            # Get current state of the intersection
+            current_state = self._get_state()
+
+            # Calculate reward of previous action
+            current_total_wait = self._collect_waiting_times()
+            reward = self._old_total_wait - current_total_wait
+
+            # Choose the light phase to activate
+            action = self._choose_action(current_state)
+
+            # If the chosen phase is different from the last phase, activate the yellow phase
+            if self._step != 0 and self._old_action != action:
+                self._set_yellow_phase(self._old_action)
+                self._simulate(self._yellow_duration)
+
+            # Execute the green phase
+            self._set_green_phase(action)
+            self._simulate(self._green_duration)
+
+            # Save variables for next step
+            self._old_action = action
+            self._old_total_wait = current_total_wait
+
+            # Add reward to episode total
+            self._reward_episode.append(reward)
+
+            # Update UI with current data, at most max_redraw_rate times per second
+            now = time.monotonic()
+            if now - self._last_emit_ts >= 1.0 / self.max_redraw_rate:
+                self._last_emit_ts = now
+                self.step_updated.emit(self._step)
+                self.vehicle_updated.emit(self.get_vehicle_data())
+                self.stats_updated.emit(self.get_statistics())
+                # The window builds its plots from the road statistics, skip them while nothing shows them
+                if self.window.stats_table.isVisible() or self.window.canvas.isVisible():
+                    self.cumulative_stats_updated.emit(self.get_summary_stats())
+
+            # Track vehicles and handle incoming vehicles
+            self._track_vehicles()
+            self._check_incoming_vehicles()
+
+            # Update server with state and get new sync timing
+            if self._communicator:
+                # Send current state
+                edge_data = self._edge_sub
+                self._queue_send_state(current_state, self._step, {
+                    'queue_length': self._get_queue_length(),
+                    'current_phase': traci.trafficlight.getPhase("TL"),
+                    'incoming_vehicles': {
+                        'N': edge_data["N2TL"][tc.LAST_STEP_VEHICLE_NUMBER],
+                        'S': edge_data["S2TL"][tc.LAST_STEP_VEHICLE_NUMBER],
+                        'E': edge_data["E2TL"][tc.LAST_STEP_VEHICLE_NUMBER],
+                        'W': edge_data["W2TL"][tc.LAST_STEP_VEHICLE_NUMBER]
+                    },
+                    'avg_speed': {
+                        'N': edge_data["N2TL"][tc.LAST_STEP_MEAN_SPEED],
+                        'S': edge_data["S2TL"][tc.LAST_STEP_MEAN_SPEED],
+                        'E': edge_data["E2TL"][tc.LAST_STEP_MEAN_SPEED],
+                        'W': edge_data["W2TL"][tc.LAST_STEP_MEAN_SPEED]
+                    }
+                })
+
+                # Apply new sync timing polled by the background thread
+                sync_data = self._communicator.take_sync_timing()
+                if sync_data:
+                    self._adjust_timing(sync_data)
+
+        except FatalTraCIError as e:
+            print(f"TraCI error: {e}")
+            self._sumo_running = False
+            self._stop_stepping()
+        except Exception as e:
+            print(f"Error in simulation loop: {e}")
+            self._stop_stepping()
+
+    def _put_network_job(self, job):
+        """Queue a job for the network worker, dropping the oldest one when the queue is full"""
+        while True:
+            try:
+                self._network_queue.put_nowait(job)
+                return
+            except queue.Full:
+                try:
+                    if self._network_queue.get_nowait() == 'coordination':
+                        self._coordination_pending.clear()
+                except queue.Empty:
+                    pass
+
+    def _queue_send_state(self, state, step, traffic_data=None):
+        """Queue a state update on the communicator, SUMO is only queried on this thread"""
+        avg_speeds = self._communicator.collect_avg_speeds()
+        # an empty result rather than None, so send_state never queries SUMO itself
+        self._communicator.send_state(state, step, traffic_data, {} if avg_speeds is None else avg_speeds)
+
+    def _network_loop(self):
+        """Worker thread fetching coordination data from the server"""
+        while True:
+            job = self._network_queue.get()
+            if job is None:
+                break
+            try:
+                response = self._communicator.get_coordination_data()
+                if response:
+                    with self._coordination_lock:
+                        self._coordination_responses.append(response)
+            except Exception as e:
+                print(f"Error in network worker: {e}")
+            finally:
+                self._coordination_pending.clear()
+
+    def _stop_stepping(self):
+        """Stop the step timer and leave the Qt event loop so run() can finish"""
+        self._step_timer.stop()
+        self._app.quit()
+
     def toggle_simulation(self):
         """Toggle simulation on/off"""
         if not self.running:
@@ -331,7 +515,8 @@ class InteractiveSimulation(QObject):
                     try:
                         traci.start(self._sumo_cmd)
                         time.sleep(2)  # Wait for traci to be ready
-                    except traci.exceptions.FatalTraCIError as e:
+                        self._on_sumo_started()
+                    except FatalTraCIError as e:
                         print(f"Error starting SUMO: {e}")
                         self.running = False
                         self.window.start_button.setText("Start Simulation")
@@ -344,8 +529,10 @@ class InteractiveSimulation(QObject):
                         self.window.status_label.setText("Status: Error starting SUMO")
                         return
 
+                self._sumo_running = True
                 self.window.start_button.setText("Stop Simulation")
                 self.window.status_label.setText("Status: Running")
+                self._step_timer.start()
             except Exception as e:
                 print(f"Error starting simulation: {e}")
                 self.running = False
@@ -354,96 +541,107 @@ class InteractiveSimulation(QObject):
         else:
             # Stop simulation
             self.running = False
+            self._sumo_running = False
+            self._step_timer.stop()
             self.window.start_button.setText("Start Simulation")
             self.window.status_label.setText("Status: Stopped")
             # Close SUMO
             if traci.isLoaded():
                 try:
                     traci.close()
-                except traci.exceptions.FatalTraCIError as e:
+                except FatalTraCIError as e:
                     print(f"Error closing SUMO: {e}")
                 except Exception as e:
                     print(f"Unexpected error closing SUMO: {e}")
 
-    def spawn_random_vehicle(self):
-        """Spawn a random vehicle in the simulation"""
-        try:
-            # Select vehicle type based on distribution
-            vehicle_type = random.choices(
-                list(self.vehicle_types.keys()),
-                weights=list(self.vehicle_types.values())
-            )[0]
-
-            # Select route based on distribution
-            route = random.choices(
-                list(self.route_weights.keys()),
-                weights=list(self.route_weights.values())
-            )[0]
-
-            # Get speed range for vehicle type
-            min_speed, max_speed = self.speed_ranges[vehicle_type]
-            speed = random.uniform(min_speed, max_speed)
-
-            # Create unique vehicle ID using counter and larger random number
+    def _on_sumo_started(self):
+        """Cache static network data once SUMO is running"""
+        self._current_ids = tuple(traci.vehicle.getIDList())
+        # The road network does not change, so fetch each road shape only once
+        self._road_endpoints = {}
+        for road in self.roads.values():
+            road_shape = traci.edge.getShape(road)
+            if road_shape:
+                self._road_endpoints[road] = (road_shape[0], road_shape[-1])
+
+        # Register one route per (entry road, destination edge) pair for incoming vehicles
+        self._route_pool = {}
+        for road in self.roads.values():
+            self._route_pool[(road, None)] = f"incoming_{road}"
+            traci.route.add(f"incoming_{road}", [road])
+            for exit_road in ["TL2N", "TL2S", "TL2E", "TL2W"]:
+                route_id = f"incoming_{road}_{exit_road}"
+                self._route_pool[(road, exit_road)] = route_id
+                traci.route.add(route_id, [road, exit_road])
+
+        # Subscribe to the per-step aggregates of the incoming roads
+        for road in self.roads.values():
+            traci.edge.subscribe(road, [tc.LAST_STEP_VEHICLE_HALTING_NUMBER, tc.LAST_STEP_VEHICLE_NUMBER,
+                                        tc.LAST_STEP_MEAN_SPEED])
+        self._edge_sub = traci.edge.getAllSubscriptionResults()
+
+    def _update_sampling_tables(self):
+        """Precompute the cumulative weights used to sample vehicle types and routes"""
+        self._vt_keys = np.array(list(self.vehicle_types.keys()))
+        self._vt_cum = np.cumsum(np.fromiter(self.vehicle_types.values(), dtype=np.int64))
+        self._vt_total = int(self._vt_cum[-1])
+        self._rw_keys = np.array(list(self.route_weights.keys()))
+        self._rw_cum = np.cumsum(np.fromiter(self.route_weights.values(), dtype=np.int64))
+        self._rw_total = int(self._rw_cum[-1])
+
+    def spawn_random_vehicle(self, count=1):
+        """Spawn count random vehicles in the simulation"""
+        # Select vehicle types and routes based on distribution, one draw for the whole batch
+        vehicle_types = self._vt_keys[np.searchsorted(self._vt_cum, self._rng.integers(self._vt_total, size=count),
+                                                      side='right')].tolist()
+        routes = self._rw_keys[np.searchsorted(self._rw_cum, self._rng.integers(self._rw_total, size=count),
+                                               side='right')].tolist()
+
+        # Draw the speeds of the whole batch within the range of each vehicle type
+        min_speeds = [self.speed_ranges[vehicle_type][0] for vehicle_type in vehicle_types]
+        max_speeds = [self.speed_ranges[vehicle_type][1] for vehicle_type in vehicle_types]
+        speeds = self._rng.uniform(min_speeds, max_speeds)
+
+        # Create unique vehicle IDs using counter and larger random number
+        suffixes = self._rng.integers(10000, 100000, size=count)  # Increased range
+        spawns = []
+        for vehicle_type, route, speed, random_suffix in zip(vehicle_types, routes, speeds, suffixes):
             self._vehicle_counter += 1
-            random_suffix = random.randint(10000, 99999)  # Increased range
             vehicle_id = f"{vehicle_type}_{route}_{self._vehicle_counter}_{random_suffix}"
+            spawns.append((vehicle_id, vehicle_type, route, str(speed)))
 
-            # Add vehicle with proper type and departure time
-            traci.vehicle.add(
-                vehID=vehicle_id,
-                routeID=route,
-                typeID=vehicle_type,
-                departLane="random",
-                departSpeed=str(speed)
-            )
-        except Exception as e:
-            print(f"Error spawning random vehicle: {e}")
+        # Add all vehicles back to back before the next simulation step
+        for vehicle_id, vehicle_type, route, speed in spawns:
+            try:
+                traci.vehicle.add(
+                    vehID=vehicle_id,
+                    routeID=route,
+                    typeID=vehicle_type,
+                    departLane="random",
+                    departSpeed=speed
+                )
+                self._vehicle_cache[vehicle_id] = {'type': vehicle_type, 'route': route}
+            except Exception as e:
+                print(f"Error spawning random vehicle: {e}")
 
     def _get_state(self):
         """
         Retrieve the state of the intersection from sumo
         """
-        if not traci.isLoaded():
-            return np.zeros(self._num_states)
-
-        state = np.zeros(self._num_states)
-        car_list = traci.vehicle.getIDList()
-
-        for car_id in car_list:
-            lane_pos = traci.vehicle.getLanePosition(car_id)
-            lane_id = traci.vehicle.getLaneID(car_id)
-
-            # x is the position of the car in the lane
-            lane_cell = int(lane_pos / 7.5)
-
-            # Find the lane where the car is located
-            # x2TL_3 are the "turn left only" lanes
-            if lane_id == "W2TL_0" or lane_id == "W2TL_1" or lane_id == "W2TL_2":
-                lane_group = 0
-            elif lane_id == "W2TL_3":
-                lane_group = 1
-            elif lane_id == "N2TL_0" or lane_id == "N2TL_1" or lane_id == "N2TL_2":
-                lane_group = 2
-            elif lane_id == "N2TL_3":
-                lane_group = 3
-            elif lane_id == "E2TL_0" or lane_id == "E2TL_1" or lane_id == "E2TL_2":
-                lane_group = 4
-            elif lane_id == "E2TL_3":
-                lane_group = 5
-            elif lane_id == "S2TL_0" or lane_id == "S2TL_1" or lane_id == "S2TL_2":
-                lane_group = 6
-            elif lane_id == "S2TL_3":
-                lane_group = 7
-            else:
-                lane_group = -1
+        results = self._vehicle_results
+        if not self._current_ids or not results or not self._sumo_running:
+            return self._zero_state
 
-            if lane_group >= 0 and lane_group <= 7:
-                # Calculate position in state array
-                # Each lane group has 10 cells (0-9)
-                car_position = (lane_group * 10) + min(lane_cell, 9)
-                if car_position < self._num_states:
-                    state[car_position] = 1
+        state = np.zeros(self._num_states, dtype=np.uint8)
+
+        # lane and position of every car come from the vehicle subscriptions of the last step
+        lane_pos = np.fromiter((data[tc.VAR_LANEPOSITION] for data in results.values()),
+                               dtype=np.float64, count=len(results))
+        groups = np.fromiter((self._lane_to_group.get(data[tc.VAR_LANE_ID], -1) for data in results.values()),
+                             dtype=np.int32, count=len(results))
+
+        # Each lane group has 10 cells (0-9), each cell is 7.5m long
+        _fill_state(groups, (lane_pos / 7.5).astype(np.int32), state)
 
         return state
 
@@ -451,33 +649,62 @@ class InteractiveSimulation(QObject):
         """
         Retrieve the waiting time of every car in the incoming roads
         """
-        if not traci.isLoaded():
+        if not self._current_ids or not self._sumo_running:
+            if self._wait_idx:
+                self._reset_waiting_times()
             return 0
 
-        incoming_roads = ["E2TL", "N2TL", "W2TL", "S2TL"]
-        car_list = traci.vehicle.getIDList()
-        for car_id in car_list:
-            wait_time = traci.vehicle.getAccumulatedWaitingTime(car_id)
-            road_id = traci.vehicle.getRoadID(car_id)  # get the road id where the car is located
-            if road_id in incoming_roads:  # consider only the waiting times of cars in incoming roads
-                self._waiting_times[car_id] = wait_time
-            else:
-                if car_id in self._waiting_times: # a car that was tracked has cleared the intersection
-                    del self._waiting_times[car_id]
-        total_waiting_time = sum(self._waiting_times.values())
+        # consider only the waiting times of cars in incoming roads, cars that
+        # cleared the intersection are simply not part of the results anymore
+        seen = set()
+        for car_id, data in self._vehicle_results.items():
+            if data[tc.VAR_ROAD_ID] not in _ROAD_INDEX:
+                continue
+            idx = self._wait_idx.get(car_id)
+            if idx is None:
+                if not self._free_indices:
+                    self._grow_waiting_times()
+                idx = self._free_indices.pop()
+                self._wait_idx[car_id] = idx
+            self._wait_arr[idx] = data[tc.VAR_ACCUMULATED_WAITING_TIME]
+            seen.add(car_id)
+
+        # give the slots of the cars that are gone back to the free list
+        for car_id in self._wait_idx.keys() - seen:
+            idx = self._wait_idx.pop(car_id)
+            self._wait_arr[idx] = 0
+            self._free_indices.append(idx)
+
+        total_waiting_time = float(self._wait_arr.sum())
         return total_waiting_time
 
+    def _reset_waiting_times(self):
+        """
+        Empty the waiting time arena, one float32 slot per tracked car
+        """
+        self._wait_arr = np.zeros(MAX_VEHICLES, dtype=np.float32)
+        self._wait_idx = {}
+        self._free_indices = list(range(MAX_VEHICLES - 1, -1, -1))
+
+    def _grow_waiting_times(self):
+        """
+        Double the waiting time arena when every slot is taken
+        """
+        size = len(self._wait_arr)
+        self._wait_arr = np.concatenate((self._wait_arr, np.zeros(size, dtype=np.float32)))
+        self._free_indices.extend(range(2 * size - 1, size - 1, -1))
+
     def _choose_action(self, state):
         """
         Pick the best action known for the current state of the env
         """
-        return np.argmax(self._Model.predict_one(state))
+        return np.argmax(self._Model.predict_one(state.astype(np.float32, copy=False)))
 
     def _set_yellow_phase(self, old_action):
         """
         Activate the correct yellow light combination in sumo
         """
-        if not traci.isLoaded():
+        if not self._sumo_running:
             return
 
         yellow_phase_code = old_action * 2 + 1
@@ -488,7 +715,7 @@ class InteractiveSimulation(QObject):
         """
         Activate the correct green light combination in sumo
         """
-        if not traci.isLoaded():
+        if not self._sumo_running:
             return
 
         if action_number == 0:
@@ -506,12 +733,12 @@ class InteractiveSimulation(QObject):
 
     def _track_vehicles(self):
         """Track vehicles that enter and exit the simulation"""
-        if not traci.isLoaded():
+        if not self._sumo_running:
             return
 
         try:
             # Get current vehicles
-            current_vehicles = set(traci.vehicle.getIDList())
+            current_vehicles = set(self._current_ids)
             
             # Find vehicles that have exited
             exited = self._active_vehicles - current_vehicles
@@ -528,35 +755,37 @@ class InteractiveSimulation(QObject):
                     exit_direction = None
                     
                     # Check if vehicle exited through a boundary road
-                    if last_road in self.roads.values():
-                        # Get the road's position and dimensions
-                        road_shape = traci.edge.getShape(last_road)
-                        if road_shape:
-                            start_pos, end_pos = road_shape[0], road_shape[-1]
-                            
-                            # Calculate distance to road endpoints
-                            dist_to_start = ((last_position[0] - start_pos[0])**2 + 
-                                           (last_position[1] - start_pos[1])**2)**0.5
-                            dist_to_end = ((last_position[0] - end_pos[0])**2 + 
-                                         (last_position[1] - end_pos[1])**2)**0.5
-                            
-                            # If vehicle is close to either endpoint, consider it a boundary exit
-                            if dist_to_start < 5.0 or dist_to_end < 5.0:
-                                is_boundary_exit = True
-                                # Determine exit direction based on road and position
-                                if last_road == 'N2TL':
-                                    exit_direction = 'north'
-                                elif last_road == 'S2TL':
-                                    exit_direction = 'south'
-                                elif last_road == 'E2TL':
-                                    exit_direction = 'east'
-                                elif last_road == 'W2TL':
-                                    exit_direction = 'west'
-                    
+                    endpoints = self._road_endpoints.get(last_road)
+                    if endpoints:
+                        (sx, sy), (ex, ey) = endpoints
+                        x, y = last_position
+
+                        # If vehicle is within 5m of either endpoint, consider it a boundary exit
+                        # (squared distances are compared to avoid the square root)
+                        if (x - sx)**2 + (y - sy)**2 < 25.0 or (x - ex)**2 + (y - ey)**2 < 25.0:
+                            is_boundary_exit = True
+                            # Determine exit direction based on road and position
+                            if last_road == 'N2TL':
+                                exit_direction = 'north'
+                            elif last_road == 'S2TL':
+                                exit_direction = 'south'
+                            elif last_road == 'E2TL':
+                                exit_direction = 'east'
+                            elif last_road == 'W2TL':
+                                exit_direction = 'west'
+                
+                    # Type and route were cached at spawn, only vehicles added elsewhere need a lookup
+                    cached = self._vehicle_cache.pop(vehicle_id, None)
+                    if cached is None:
+                        cached = {
+                            'type': traci.vehicle.getTypeID(vehicle_id),
+                            'route': traci.vehicle.getRouteID(vehicle_id)
+                        }
+
                     # Store vehicle info
                     self._exited_vehicles[vehicle_id] = {
-                        'type': traci.vehicle.getTypeID(vehicle_id),
-                        'route': traci.vehicle.getRouteID(vehicle_id),
+                        'type': cached['type'],
+                        'route': cached['route'],
                         'speed': last_speed,
                         'lane': last_lane,
                         'position': last_position,
@@ -571,11 +800,11 @@ class InteractiveSimulation(QObject):
                     
                     # Send vehicle info to server if connected and it's a boundary exit
                     if self._communicator and is_boundary_exit and exit_direction:
-                        self._communicator.send_state(None, self._step, {
+                        self._queue_send_state(None, self._step, {
                             'vehicle_transfer': {
                                 'vehicle_id': vehicle_id,
-                                'type': traci.vehicle.getTypeID(vehicle_id),
-                                'route': traci.vehicle.getRouteID(vehicle_id),
+                                'type': cached['type'],
+                                'route': cached['route'],
                                 'speed': last_speed,
                                 'lane': last_lane,
                                 'position': last_position,
@@ -584,7 +813,7 @@ class InteractiveSimulation(QObject):
                                 'to_agent': self.road_connections.get(last_road)
                             }
                         })
-                except traci.exceptions.TraCIException:
+                except TraCIException:
                     # Vehicle is no longer in simulation, skip it
                     continue
                 except Exception as e:
@@ -597,14 +826,20 @@ class InteractiveSimulation(QObject):
 
     def _check_incoming_vehicles(self):
         """Check for and spawn incoming vehicles from other intersections"""
-        if not traci.isLoaded() or not self._communicator:
+        if not self._sumo_running or not self._communicator:
             return
 
         try:
-            # Get any incoming vehicles from the server
-            response = self._communicator.get_coordination_data()
-            if response and 'incoming_vehicles' in response:
-                for vehicle_data in response['incoming_vehicles']:
+            # Ask the worker for fresh data and take the responses fetched so far
+            if not self._coordination_pending.is_set():
+                self._coordination_pending.set()
+                self._put_network_job('coordination')
+            with self._coordination_lock:
+                responses = self._coordination_responses
+                self._coordination_responses = []
+
+            for response in responses:
+                for vehicle_data in response.get('incoming_vehicles', []):
                     if vehicle_data['to_agent'] == self._agent_id:
                         # Add to incoming vehicles list with spawn position
                         entry_road = None
@@ -622,11 +857,11 @@ class InteractiveSimulation(QObject):
                                 entry_road = 'E2TL'
                         
                         if entry_road:
-                            # Get road shape to determine spawn position
-                            road_shape = traci.edge.getShape(entry_road)
-                            if road_shape:
+                            # Road endpoints cached when SUMO started determine the spawn position
+                            endpoints = self._road_endpoints.get(entry_road)
+                            if endpoints:
                                 # Spawn at the start of the road
-                                spawn_pos = road_shape[0]
+                                spawn_pos = endpoints[0]
                                 
                                 # Add spawn information to vehicle data
                                 vehicle_data['spawn_road'] = entry_road
@@ -641,18 +876,18 @@ class InteractiveSimulation(QObject):
             while self._incoming_vehicles:
                 vehicle_data = self._incoming_vehicles.pop(0)
                 try:
-                    # Create route for the vehicle
-                    route_id = f"route_{vehicle_data['vehicle_id']}"
-                    route_edges = [vehicle_data['spawn_road']]
-                    
                     # Add destination edge based on original route
+                    dest_edge = None
                     if 'route' in vehicle_data:
                         route_parts = vehicle_data['route'].split()
                         if len(route_parts) > 1:
-                            route_edges.append(route_parts[1])
-                    
-                    # Add the route
-                    traci.route.add(route_id, route_edges)
+                            dest_edge = route_parts[1]
+
+                    # Reuse the pooled route, only create a new one for unknown destinations
+                    route_id = self._route_pool.get((vehicle_data['spawn_road'], dest_edge))
+                    if route_id is None:
+                        route_id = f"route_{vehicle_data['vehicle_id']}"
+                        traci.route.add(route_id, [vehicle_data['spawn_road'], dest_edge])
                     
                     # Spawn the vehicle
                     traci.vehicle.add(
@@ -663,6 +898,7 @@ class InteractiveSimulation(QObject):
                         departSpeed=str(vehicle_data['speed']),
                         departPos="0"
                     )
+                    self._vehicle_cache[vehicle_data['vehicle_id']] = {'type': vehicle_data['type'], 'route': route_id}
                     
                     print(f"Spawned incoming vehicle {vehicle_data['vehicle_id']} on {vehicle_data['spawn_road']}")
                     
@@ -678,19 +914,41 @@ class InteractiveSimulation(QObject):
         """
         Proceed in the simulation in sumo
         """
-        if not traci.isLoaded():
+        if not self._sumo_running:
             return
 
         if (self._step + steps_todo) >= self._max_steps:  # do not do more steps than the maximum allowed number of steps
             steps_todo = self._max_steps - self._step
 
-        while steps_todo > 0:
+        # Without sumo-gui several steps can be simulated per call, the loop body then runs once per batch
+        batch = self._batch_steps if self._headless else 1
+
+        for done in range(0, steps_todo, batch):
             try:
-                traci.simulationStep()  # simulate 1 step in sumo
-                self._step += 1  # update the step counter
-                steps_todo -= 1
+                steps = min(batch, steps_todo - done)
+                if steps > 1:
+                    traci.simulationStep(traci.simulation.getTime() + steps * traci.simulation.getDeltaT())
+                else:
+                    traci.simulationStep()  # simulate 1 step in sumo
+                self._current_ids = tuple(traci.vehicle.getIDList())  # shared by everything else this step
+                self._edge_sub = traci.edge.getAllSubscriptionResults()  # already sent with the step
+                # Subscribe the vehicles that are new since the last results
+                for vehicle_id in self._current_ids:
+                    if vehicle_id not in self._vehicle_results:
+                        traci.vehicle.subscribe(vehicle_id, VEHICLE_VARIABLES)
+                self._vehicle_results = traci.vehicle.getAllSubscriptionResults()
+                self._step += steps  # update the step counter
+                # A batch is sampled once, the sample counts for every step it covers
                 queue_length = self._get_queue_length()
-                self._queue_length_episode.append(queue_length)
+                end = self._queue_n + steps
+                if end > len(self._queue_arr):
+                    self._queue_arr = np.resize(self._queue_arr, max(len(self._queue_arr) * 2, end))
+                self._queue_arr[self._queue_n:end] = queue_length
+                self._queue_n = end
+                self._q_sum += queue_length * steps
+                self._q_count += steps
+                if queue_length > self._q_max:
+                    self._q_max = queue_length
                 
                 # Only handle vehicle tracking and spawning if auto_spawn is enabled
                 if self.auto_spawn:
@@ -698,11 +956,13 @@ class InteractiveSimulation(QObject):
                     self._track_vehicles()
                     self._check_incoming_vehicles()
                 
-                # Emit step update signal
-                self.step_updated.emit(self._step)
-            except traci.exceptions.FatalTraCIError as e:
+                # Emit step update signal every few steps, the last step is always shown
+                if self._step % self._ui_refresh_every < steps or self._step >= self._max_steps:
+                    self.step_updated.emit(self._step)
+            except FatalTraCIError as e:
                 print(f"TraCI error during simulation step: {e}")
                 self.running = False
+                self._sumo_running = False
                 self.window.start_button.setText("Start Simulation")
                 self.window.status_label.setText("Status: Error - Connection lost")
                 break
@@ -717,14 +977,12 @@ class InteractiveSimulation(QObject):
         """
         Calculate the total number of cars with speed = 0 in every incoming lane
         """
-        if not traci.isLoaded():
+        if not self._sumo_running:
             return 0
 
-        halt_N = traci.edge.getLastStepHaltingNumber("N2TL")
-        halt_S = traci.edge.getLastStepHaltingNumber("S2TL")
-        halt_E = traci.edge.getLastStepHaltingNumber("E2TL")
-        halt_W = traci.edge.getLastStepHaltingNumber("W2TL")
-        queue_length = halt_N + halt_S + halt_E + halt_W
+        # halting numbers arrive with the edge subscription, no request is made here
+        edge_sub = self._edge_sub
+        queue_length = sum(edge_sub[road][tc.LAST_STEP_VEHICLE_HALTING_NUMBER] for road in STAT_ROADS)
         return queue_length
 
     def _adjust_timing(self, sync_data):
@@ -742,12 +1000,13 @@ class InteractiveSimulation(QObject):
         """Clean up when done"""
         # Stop the simulation
         self.running = False
+        self._sumo_running = False
         
         # Close SUMO if it's running
         if traci.isLoaded():
             try:
                 traci.close()
-            except traci.exceptions.FatalTraCIError as e:
+            except FatalTraCIError as e:
                 print(f"Error closing SUMO: {e}")
             except Exception as e:
                 print(f"Unexpected error closing SUMO: {e}")
@@ -755,6 +1014,8 @@ class InteractiveSimulation(QObject):
         # Update server status if connected
         if self._communicator:
             try:
+                self._put_network_job(None)
+                self._network_thread.join(timeout=5)
                 self._communicator.update_status("test_terminated")
                 self._communicator.stop_background_sync()
                 self._communicator.sync_with_server()  # Final sync
@@ -768,142 +1029,46 @@ class InteractiveSimulation(QObject):
 
     def update_distribution_preset(self, preset_num):
         """Update vehicle type and route distributions based on preset number"""
-        if preset_num == 1:  # Urban Rush Hour
-            self.vehicle_types = {
-                "veh_passenger": 75,
-                "veh_bus": 15,
-                "veh_truck": 5,
-                "veh_emergency": 3,
-                "veh_motorcycle": 2
-            }
-            self.route_weights = {
-                "W_N": 12, "W_E": 15, "W_S": 8,
-                "N_W": 8, "N_E": 15, "N_S": 12,
-                "E_N": 15, "E_S": 8, "E_W": 12,
-                "S_N": 8, "S_E": 12, "S_W": 15
-            }
-        elif preset_num == 2:  # Highway Traffic
-            self.vehicle_types = {
-                "veh_passenger": 45,
-                "veh_bus": 10,
-                "veh_truck": 35,
-                "veh_emergency": 5,
-                "veh_motorcycle": 5
-            }
-            self.route_weights = {
-                "W_N": 10, "W_E": 20, "W_S": 10,
-                "N_W": 10, "N_E": 20, "N_S": 10,
-                "E_N": 10, "E_S": 20, "E_W": 10,
-                "S_N": 10, "S_E": 20, "S_W": 10
-            }
-        elif preset_num == 3:  # Mixed Traffic
-            self.vehicle_types = {
-                "veh_passenger": 40,
-                "veh_bus": 20,
-                "veh_truck": 20,
-                "veh_emergency": 10,
-                "veh_motorcycle": 10
-            }
-            self.route_weights = {
-                "W_N": 8, "W_E": 8, "W_S": 8,
-                "N_W": 8, "N_E": 8, "N_S": 8,
-                "E_N": 8, "E_S": 8, "E_W": 8,
-                "S_N": 8, "S_E": 8, "S_W": 8
-            }
-        elif preset_num == 4:  # Emergency Heavy
-            self.vehicle_types = {
-                "veh_passenger": 30,
-                "veh_bus": 10,
-                "veh_truck": 10,
-                "veh_emergency": 40,
-                "veh_motorcycle": 10
-            }
-            self.route_weights = {
-                "W_N": 15, "W_E": 5, "W_S": 15,
-                "N_W": 5, "N_E": 15, "N_S": 5,
-                "E_N": 15, "E_S": 5, "E_W": 15,
-                "S_N": 5, "S_E": 15, "S_W": 5
-            }
-        elif preset_num == 5:  # North-South Dominant
-            self.vehicle_types = {
-                "veh_passenger": 45,
-                "veh_bus": 10,
-                "veh_truck": 2,
-                "veh_emergency": 3,
-                "veh_motorcycle": 40
-            }
-            self.route_weights = {
-                "W_N": 5, "W_E": 10, "W_S": 5,
-                "N_W": 15, "N_E": 5, "N_S": 15,
-                "E_N": 15, "E_S": 5, "E_W": 10,
-                "S_N": 15, "S_E": 5, "S_W": 5
-            }
-        elif preset_num == 6:  # East-West Dominant
-            self.vehicle_types = {
-                "veh_passenger": 55,
-                "veh_bus": 12,
-                "veh_truck": 1,
-                "veh_emergency": 2,
-                "veh_motorcycle": 30
-            }
-            self.route_weights = {
-                "W_N": 10, "W_E": 15, "W_S": 10,
-                "N_W": 5, "N_E": 15, "N_S": 5,
-                "E_N": 5, "E_S": 15, "E_W": 15,
-                "S_N": 5, "S_E": 15, "S_W": 5
-            }
-        elif preset_num == 7:  # Diagonal Dominant
-            self.vehicle_types = {
-                "veh_passenger": 40,
-                "veh_bus": 8,
-                "veh_truck": 2,
-                "veh_emergency": 5,
-                "veh_motorcycle": 45
-            }
-            self.route_weights = {
-                "W_N": 15, "W_E": 5, "W_S": 5,
-                "N_W": 5, "N_E": 15, "N_S": 5,
-                "E_N": 5, "E_S": 15, "E_W": 5,
-                "S_N": 5, "S_E": 5, "S_W": 15
-            }
-        elif preset_num == 8:  # Circular Flow
-            self.vehicle_types = {
-                "veh_passenger": 35,
-                "veh_bus": 7,
-                "veh_truck": 1,
-                "veh_emergency": 2,
-                "veh_motorcycle": 55
-            }
-            self.route_weights = {
-                "W_N": 15, "W_E": 5, "W_S": 5,
-                "N_W": 5, "N_E": 15, "N_S": 5,
-                "E_N": 5, "E_S": 15, "E_W": 5,
-                "S_N": 5, "S_E": 5, "S_W": 15
-            }
+        if 1 <= preset_num <= len(DISTRIBUTION_PRESETS):
+            self.vehicle_types, self.route_weights = DISTRIBUTION_PRESETS[preset_num - 1]
+
+        self._update_sampling_tables()
 
     def get_vehicle_data(self):
         """Get current vehicle data for UI update"""
-        if not traci.isLoaded():
+        if not self._sumo_running:
             return {}
 
+        # Only send the vehicles inside the visible part of the SUMO view
+        vehicle_ids = self._current_ids
+        results = self._vehicle_results
+        bounds = None if self._headless else self.window.get_view_bounds()
+        if bounds is not None and vehicle_ids:
+            xmin, xmax, ymin, ymax = bounds
+            # vehicles without a subscribed position yet are placed inside the view and kept
+            xy = np.array([results[vid][tc.VAR_POSITION] if vid in results else (xmin, ymin)
+                           for vid in vehicle_ids], dtype=np.float64)
+            mask = (xy[:, 0] >= xmin) & (xy[:, 0] <= xmax) & (xy[:, 1] >= ymin) & (xy[:, 1] <= ymax)
+            vehicle_ids = [vid for vid, visible in zip(vehicle_ids, mask) if visible]
+
         vehicles = {}
-        for vid in traci.vehicle.getIDList():
-            try:
-                vehicles[vid] = {
-                    'route': traci.vehicle.getRouteID(vid),
-                    'road': traci.vehicle.getRoadID(vid),
-                    'lane': traci.vehicle.getLaneIndex(vid),
-                    'speed': round(traci.vehicle.getSpeed(vid), 1),
-                    'waiting': round(traci.vehicle.getWaitingTime(vid), 1)
-                }
-            except Exception as e:
-                print(f"Error getting vehicle data for {vid}: {e}")
+        for vid in vehicle_ids:
+            data = results.get(vid)
+            if data is None:
+                continue
+            vehicles[vid] = {
+                'route': data[tc.VAR_ROUTE_ID],
+                'road': data[tc.VAR_ROAD_ID],
+                'lane': data[tc.VAR_LANE_INDEX],
+                'speed': round(data[tc.VAR_SPEED], 1),
+                'waiting': round(data[tc.VAR_WAITING_TIME], 1)
+            }
 
         return vehicles
 
     def get_statistics(self):
         """Get current statistics for UI update"""
-        if not traci.isLoaded():
+        if not self._sumo_running:
             return {}
 
         stats = {}
@@ -915,10 +1080,11 @@ class InteractiveSimulation(QObject):
         }
 
         for direction, edge in directions.items():
+            edge_data = self._edge_sub[edge]
             stats[direction] = {
-                'count': traci.edge.getLastStepVehicleNumber(edge),
-                'queue': traci.edge.getLastStepHaltingNumber(edge),
-                'speed': max(0, traci.edge.getLastStepMeanSpeed(edge))
+                'count': edge_data[tc.LAST_STEP_VEHICLE_NUMBER],
+                'queue': edge_data[tc.LAST_STEP_VEHICLE_HALTING_NUMBER],
+                'speed': max(0, edge_data[tc.LAST_STEP_MEAN_SPEED])
             }
 
         try:
@@ -932,12 +1098,14 @@ class InteractiveSimulation(QObject):
         """Calculate moving average of data with given window size"""
         if len(data) < window_size:
             return data
-        return np.convolve(data, np.ones(window_size)/window_size, mode='valid')
+        # sliding window sums from one cumulative sum, O(N) whatever the window size
+        c = np.cumsum(np.insert(np.asarray(data, dtype=np.float64), 0, 0.0))
+        return (c[window_size:] - c[:-window_size]) / window_size
 
-    def get_cumulative_statistics(self):
+    def get_summary_stats(self):
         """Get cumulative statistics for UI update"""
         try:
-            if not traci.isLoaded():
+            if not self._sumo_running:
                 return {
                     'total_queue': 0,
                     'total_waiting_time': 0,
@@ -958,29 +1126,19 @@ class InteractiveSimulation(QObject):
                 }
 
             # Get current vehicle list
-            vehicle_list = traci.vehicle.getIDList()
+            vehicle_list = self._current_ids
 
             # Calculate total statistics
-            total_queue = sum(self._queue_length_episode) if self._queue_length_episode else 0
-            total_waiting_time = sum(self._waiting_times.values()) if self._waiting_times else 0
+            total_queue = self._q_sum
+            tracked = len(self._wait_idx)
+            total_waiting_time = float(self._wait_arr.sum()) if tracked else 0
             total_vehicles = len(vehicle_list)
-            max_queue = max(self._queue_length_episode) if self._queue_length_episode else 0
-            max_waiting_time = max(self._waiting_times.values()) if self._waiting_times else 0
+            max_queue = self._q_max
+            max_waiting_time = float(self._wait_arr.max()) if tracked else 0
 
             # Calculate averages
-            avg_queue = np.mean(self._queue_length_episode) if self._queue_length_episode else 0
-            avg_waiting_time = np.mean(list(self._waiting_times.values())) if self._waiting_times else 0
-
-            # Initialize arrays for plot data
-            steps = np.array(range(self._step + 1))
-            queue_data = np.zeros(self._step + 1)
-            wait_data = np.zeros(self._step + 1)
-            length_data = np.zeros(self._step + 1)
-
-            # Fill arrays with actual data
-            for i, q in enumerate(self._queue_length_episode):
-                if i < len(queue_data):
-                    queue_data[i] = q
+            avg_queue = self._q_sum / self._q_count if self._q_count else 0
+            avg_waiting_time = total_waiting_time / tracked if tracked else 0
 
             stats = {
                 'total_queue': total_queue,
@@ -993,35 +1151,39 @@ class InteractiveSimulation(QObject):
                 'average_waiting_time': avg_waiting_time,
                 'average_length': 0,
                 'road_stats': {},
-                'current_step': self._step,
-                'plot_data': {
-                    'steps': steps,
-                    'queue': queue_data,
-                    'wait': wait_data,
-                    'length': length_data
-                }
+                'current_step': self._step
             }
 
             # Add per-road statistics
-            for road_id in ["N2TL", "S2TL", "E2TL", "W2TL"]:
+            # Waiting time and road index of every vehicle, reduced per road in a single pass
+            results = self._vehicle_results
+            wait_list = []
+            road_list = []
+            for vid in vehicle_list:
+                data = results.get(vid)
+                if data is not None:
+                    wait_list.append(data[tc.VAR_WAITING_TIME])
+                    road_list.append(_ROAD_INDEX.get(data[tc.VAR_ROAD_ID], -1))
+            road_totals, road_maxima, road_means = _road_reduce(np.asarray(wait_list, dtype=np.float32),
+                                                                np.asarray(road_list, dtype=np.int8),
+                                                                len(STAT_ROADS))
+
+            for i, road_id in enumerate(STAT_ROADS):
                 try:
-                    # Get vehicles on this road
-                    road_vehicles = [vid for vid in vehicle_list if traci.vehicle.getRoadID(vid) == road_id]
-
                     # Calculate road-specific statistics
-                    current_queue = traci.edge.getLastStepHaltingNumber(road_id)
-                    current_vehicles = traci.edge.getLastStepVehicleNumber(road_id)
-                    current_waiting_time = sum(traci.vehicle.getWaitingTime(vid) for vid in road_vehicles)
+                    current_queue = self._edge_sub[road_id][tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+                    current_vehicles = self._edge_sub[road_id][tc.LAST_STEP_VEHICLE_NUMBER]
+                    current_waiting_time = float(road_totals[i])
 
                     # Calculate averages
-                    avg_wait = np.mean([traci.vehicle.getWaitingTime(vid) for vid in road_vehicles]) if road_vehicles else 0
+                    avg_wait = float(road_means[i])
 
                     stats['road_stats'][road_id] = {
                         'total_queue': current_queue,
                         'total_waiting_time': current_waiting_time,
                         'total_vehicles': current_vehicles,
                         'max_queue': current_queue,
-                        'max_waiting_time': max((traci.vehicle.getWaitingTime(vid) for vid in road_vehicles), default=0),
+                        'max_waiting_time': float(road_maxima[i]),
                         'total_length': 0,
                         'current_queue': current_queue,
                         'current_waiting_time': current_waiting_time,
@@ -1038,7 +1200,7 @@ class InteractiveSimulation(QObject):
             return stats
 
         except Exception as e:
-            print(f"Error in get_cumulative_statistics: {e}")
+            print(f"Error in get_summary_stats: {e}")
             return {
                 'total_queue': 0,
                 'total_waiting_time': 0,
@@ -1055,13 +1217,7 @@ class InteractiveSimulation(QObject):
                     'E2TL': self._get_empty_road_stats(),
                     'W2TL': self._get_empty_road_stats()
                 },
-                'current_step': self._step,
-                'plot_data': {
-                    'steps': np.array([0]),
-                    'queue': np.array([0]),
-                    'wait': np.array([0]),
-                    'length': np.array([0])
-                }
+                'current_step': self._step
             }
 
     def _get_empty_road_stats(self):
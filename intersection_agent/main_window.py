@@ -3,11 +3,204 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QLineEdit, QTableWidget, QTableWidgetItem, QGroupBox,
                             QCheckBox, QSlider, QSpinBox, QRadioButton, QFrame, QHeaderView,
                             QSplitter)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from add_vehicle import SimulationThread
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QSignalBlocker
+from add_vehicle import SimulationThread, STATS_TABLE_ROADS, USE_LIBSUMO, format_stats_table, stats_plot_values
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import traci
+import os
+import sys
+from functools import partial
+from types import MappingProxyType
+import numpy as np
+from sumolib import checkBinary
+if USE_LIBSUMO:
+    import libsumo as traci
+else:
+    import traci
+
+# route weights shared by the Diagonal Dominant and Circular Flow presets
+_CIRCULAR_ROUTE_WEIGHTS = MappingProxyType({
+    "W_N": 15, "W_E": 5, "W_S": 5,
+    "N_W": 5, "N_E": 15, "N_S": 5,
+    "E_N": 5, "E_S": 15, "E_W": 5,
+    "S_N": 5, "S_E": 5, "S_W": 15
+})
+
+# vehicle type and route distributions of the presets selectable in the UI, indexed by preset number - 1
+DISTRIBUTION_PRESETS = (
+    (  # Urban Rush Hour
+        MappingProxyType({
+            "veh_passenger": 75,
+            "veh_bus": 15,
+            "veh_truck": 5,
+            "veh_emergency": 3,
+            "veh_motorcycle": 2
+        }),
+        MappingProxyType({
+            "W_N": 12, "W_E": 15, "W_S": 8,
+            "N_W": 8, "N_E": 15, "N_S": 12,
+            "E_N": 15, "E_S": 8, "E_W": 12,
+            "S_N": 8, "S_E": 12, "S_W": 15
+        })
+    ),
+    (  # Highway Traffic
+        MappingProxyType({
+            "veh_passenger": 45,
+            "veh_bus": 10,
+            "veh_truck": 35,
+            "veh_emergency": 5,
+            "veh_motorcycle": 5
+        }),
+        MappingProxyType({
+            "W_N": 10, "W_E": 20, "W_S": 10,
+            "N_W": 10, "N_E": 20, "N_S": 10,
+            "E_N": 10, "E_S": 20, "E_W": 10,
+            "S_N": 10, "S_E": 20, "S_W": 10
+        })
+    ),
+    (  # Mixed Traffic
+        MappingProxyType({
+            "veh_passenger": 40,
+            "veh_bus": 20,
+            "veh_truck": 20,
+            "veh_emergency": 10,
+            "veh_motorcycle": 10
+        }),
+        MappingProxyType({
+            "W_N": 8, "W_E": 8, "W_S": 8,
+            "N_W": 8, "N_E": 8, "N_S": 8,
+            "E_N": 8, "E_S": 8, "E_W": 8,
+            "S_N": 8, "S_E": 8, "S_W": 8
+        })
+    ),
+    (  # Emergency Heavy
+        MappingProxyType({
+            "veh_passenger": 30,
+            "veh_bus": 10,
+            "veh_truck": 10,
+            "veh_emergency": 40,
+            "veh_motorcycle": 10
+        }),
+        MappingProxyType({
+            "W_N": 15, "W_E": 5, "W_S": 15,
+            "N_W": 5, "N_E": 15, "N_S": 5,
+            "E_N": 15, "E_S": 5, "E_W": 15,
+            "S_N": 5, "S_E": 15, "S_W": 5
+        })
+    ),
+    (  # North-South Dominant
+        MappingProxyType({
+            "veh_passenger": 45,
+            "veh_bus": 10,
+            "veh_truck": 2,
+            "veh_emergency": 3,
+            "veh_motorcycle": 40
+        }),
+        MappingProxyType({
+            "W_N": 5, "W_E": 10, "W_S": 5,
+            "N_W": 15, "N_E": 5, "N_S": 15,
+            "E_N": 15, "E_S": 5, "E_W": 10,
+            "S_N": 15, "S_E": 5, "S_W": 5
+        })
+    ),
+    (  # East-West Dominant
+        MappingProxyType({
+            "veh_passenger": 55,
+            "veh_bus": 12,
+            "veh_truck": 1,
+            "veh_emergency": 2,
+            "veh_motorcycle": 30
+        }),
+        MappingProxyType({
+            "W_N": 10, "W_E": 15, "W_S": 10,
+            "N_W": 5, "N_E": 15, "N_S": 5,
+            "E_N": 5, "E_S": 15, "E_W": 15,
+            "S_N": 5, "S_E": 15, "S_W": 5
+        })
+    ),
+    (  # Diagonal Dominant
+        MappingProxyType({
+            "veh_passenger": 40,
+            "veh_bus": 8,
+            "veh_truck": 2,
+            "veh_emergency": 5,
+            "veh_motorcycle": 45
+        }),
+        _CIRCULAR_ROUTE_WEIGHTS
+    ),
+    (  # Circular Flow
+        MappingProxyType({
+            "veh_passenger": 35,
+            "veh_bus": 7,
+            "veh_truck": 1,
+            "veh_emergency": 2,
+            "veh_motorcycle": 55
+        }),
+        _CIRCULAR_ROUTE_WEIGHTS
+    )
+)
+
+# traffic light phase label texts, indexed by phase
+_PHASE_LABELS = tuple(f"Phase: {name}" for name in (
+    "NS Green", "NS Yellow", "NSL Green", "NSL Yellow",
+    "EW Green", "EW Yellow", "EWL Green", "EWL Yellow"))
+
+# number of steps kept in the plot history, older points are overwritten
+MAX_POINTS = 2048
+# rows of the per-road plot buffers
+PLOT_SERIES = ('queue', 'wait', 'length')
+# most points handed to matplotlib per line
+MAX_DRAWN_POINTS = 1000
+
+# SUMO GUI view settings written to intersection/view.xml by the render mode checkbox
+_SIMPLE_VIEW_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<viewsettings>
+    <scheme name="standard"/>
+    <delay value="20"/>
+    <vehicleMode value="0"/>
+    <vehicleQuality value="0"/>
+    <vehicleName value="0"/>
+    <vehicleSize value="1.0"/>
+    <vehicleNameShow value="0"/>
+    <vehicleNameSize value="50"/>
+    <vehicleNameColor value="0,0,0"/>
+    <vehicleNameBackground value="0"/>
+    <vehicleNameBackgroundColor value="255,255,255"/>
+    <vehicleNameBackgroundAlpha value="0.5"/>
+    <vehicleNameBackgroundSize value="0.5"/>
+    <vehicleNameBackgroundOffset value="0.0"/>
+    <vehicleNameBackgroundRotation value="0.0"/>
+    <vehicleNameBackgroundScale value="1.0"/>
+    <minGap value="0.5"/>
+</viewsettings>"""
+
+_REAL_VIEW_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<viewsettings>
+    <scheme name="real world"/>
+    <delay value="20"/>
+    <vehicleMode value="9"/>
+    <vehicleQuality value="3"/>
+    <vehicleName value="0"/>
+    <vehicleSize value="1.0"/>
+    <vehicleNameShow value="0"/>
+    <vehicleNameSize value="50"/>
+    <vehicleNameColor value="0,0,0"/>
+    <vehicleNameBackground value="0"/>
+    <vehicleNameBackgroundColor value="255,255,255"/>
+    <vehicleNameBackgroundAlpha value="0.5"/>
+    <vehicleNameBackgroundSize value="0.5"/>
+    <vehicleNameBackgroundOffset value="0.0"/>
+    <vehicleNameBackgroundRotation value="0.0"/>
+    <vehicleNameBackgroundScale value="1.0"/>
+    <minGap value="2.5"/>
+</viewsettings>"""
+
+
+def _decimate(xs, ys, max_pts=MAX_DRAWN_POINTS):
+    """Keep every n-th point so that at most about max_pts points are drawn, ys may hold several rows"""
+    stride = max(1, len(xs) // max_pts)
+    return xs[::stride], ys[..., ::stride]
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -17,10 +210,17 @@ class MainWindow(QMainWindow):
 
         # Create simulation thread FIRST
         self.sim_thread = SimulationThread()
-        self.sim_thread.step_updated.connect(self.update_step)
-        self.sim_thread.vehicle_updated.connect(self.update_vehicles)
-        self.sim_thread.stats_updated.connect(self.update_statistics)
-        self.sim_thread.cumulative_stats_updated.connect(self.update_cumulative_statistics)
+        
+        # Pull the latest simulation data at a fixed rate instead of handling a signal per step
+        self._ui_timer = QTimer(self)
+        self._ui_timer.timeout.connect(self._pull_state)
+        self._ui_timer.start(50)
+        
+        # Statistics pushed by signal are painted at most once per paint timer period
+        self._pending_stats = None
+        self._paint_timer = QTimer(self)
+        self._paint_timer.setSingleShot(True)
+        self._paint_timer.timeout.connect(self._flush_stats)
 
         # Create central widget and layout
         central_widget = QWidget()
@@ -64,25 +264,41 @@ class MainWindow(QMainWindow):
             'W2TL': self.figure.add_subplot(414)
         }
         
-        # Initialize plot data for each road
-        self.plot_data = {
-            'steps': [],
-            'N2TL': {'queue': [], 'wait': [], 'length': []},
-            'S2TL': {'queue': [], 'wait': [], 'length': []},
-            'E2TL': {'queue': [], 'wait': [], 'length': []},
-            'W2TL': {'queue': [], 'wait': [], 'length': []}
-        }
+        # Initialize plot data, one ring buffer of MAX_POINTS steps shaped (road, series, step)
+        # Roads are in the order of the statistics table, so a (road, series) array fills one step at once
+        self._road_idx = {road: i for i, road in enumerate(STATS_TABLE_ROADS)}
+        self._series = np.empty((len(self.axes), len(PLOT_SERIES), MAX_POINTS), dtype=np.float32)
+        self._steps = np.empty(MAX_POINTS, dtype=np.int32)
+        self._head = 0  # next write position
+        self._count = 0  # number of valid points
         
-        # Set up plots
+        # Set up plots, the lines are animated so they can be blitted over a cached background
+        self._lines = {}
         for road, ax in self.axes.items():
+            self._lines[road] = {
+                'queue': ax.plot([], [], label='Queue', color='red', linewidth=2, animated=True)[0],
+                'wait': ax.plot([], [], label='Wait Time', color='blue', linewidth=2, animated=True)[0],
+                'length': ax.plot([], [], label='Queue Length', color='green', linewidth=2, animated=True)[0]
+            }
             ax.set_title(f'{road} Statistics')
             ax.set_xlabel('Simulation Steps')
-            ax.set_ylabel('Value')
+            ax.set_ylabel('Queue (veh) / Wait Time (s)')
             ax.grid(True)
-            ax.legend(['Queue', 'Wait Time', 'Queue Length'])
-        
-        # Adjust layout to prevent overlap
-        self.figure.tight_layout(pad=3.0)
+            ax.legend()
+        
+        # Adjust layout to prevent overlap, once, the plot updates never change it
+        self.figure.subplots_adjust(
+            left=0.1,
+            right=0.9,
+            top=0.95,
+            bottom=0.05,
+            hspace=0.3,
+            wspace=0.2
+        )
+        
+        # Background without the lines, refreshed after every full draw (first show, resize, rescale)
+        self._bg = None
+        self.canvas.mpl_connect('draw_event', self._on_canvas_draw)
         
         # Add canvas to layout
         plot_layout.addWidget(self.canvas)
@@ -109,6 +325,18 @@ class MainWindow(QMainWindow):
 
         # Initialize vehicle counter
         self.vehicle_counter = 0
+        
+        # Render mode last written to view.xml, None until the checkbox is first toggled
+        self._last_render_mode = None
+        
+        # Step currently shown by step_label
+        self._last_step_shown = 0
+        
+        # Whether the SUMO GUI view can be queried, cleared after the first failed query
+        self._has_gui_view = not USE_LIBSUMO
+        
+        # Table items of the vehicle table, one list of 7 items per row, reused between updates
+        self._vehicle_items = []
 
         # Show window
         self.show()
@@ -188,7 +416,7 @@ class MainWindow(QMainWindow):
         # Create radio buttons
         for i, name in enumerate(preset_names):
             radio = QRadioButton(name)
-            radio.clicked.connect(lambda checked, idx=i+1: self.apply_distribution_preset(idx) if checked else None)
+            radio.clicked.connect(partial(self._on_preset_clicked, i+1))
             self.preset_buttons.append(radio)
             preset_layout.addWidget(radio)
         
@@ -201,13 +429,7 @@ class MainWindow(QMainWindow):
         interval_layout.setSpacing(2)
         
         fixed_interval_layout = QHBoxLayout()
-        fixed_interval_layout.addWidget(QLabel("Fixed:"))
-        self.interval_spin = QSpinBox()
-        self.interval_spin.setMinimum(1)
-        self.interval_spin.setMaximum(100)
-        self.interval_spin.setValue(4)  # Default to 4
-        self.interval_spin.valueChanged.connect(self.update_spawn_interval)
-        fixed_interval_layout.addWidget(self.interval_spin)
+        self.interval_spin = self._create_spin(fixed_interval_layout, "Fixed:", 1, 100, 4, self.update_spawn_interval)
         interval_layout.addLayout(fixed_interval_layout)
         
         random_interval_layout = QHBoxLayout()
@@ -217,21 +439,8 @@ class MainWindow(QMainWindow):
         random_interval_layout.addWidget(self.random_interval_check)
         
         min_max_layout = QHBoxLayout()
-        min_max_layout.addWidget(QLabel("Min:"))
-        self.min_interval_spin = QSpinBox()
-        self.min_interval_spin.setMinimum(1)
-        self.min_interval_spin.setMaximum(50)
-        self.min_interval_spin.setValue(4)  # Default to 4
-        self.min_interval_spin.valueChanged.connect(self.update_min_interval)
-        min_max_layout.addWidget(self.min_interval_spin)
-        
-        min_max_layout.addWidget(QLabel("Max:"))
-        self.max_interval_spin = QSpinBox()
-        self.max_interval_spin.setMinimum(1)
-        self.max_interval_spin.setMaximum(100)
-        self.max_interval_spin.setValue(15)
-        self.max_interval_spin.valueChanged.connect(self.update_max_interval)
-        min_max_layout.addWidget(self.max_interval_spin)
+        self.min_interval_spin = self._create_spin(min_max_layout, "Min:", 1, 50, 4, self.update_min_interval)
+        self.max_interval_spin = self._create_spin(min_max_layout, "Max:", 1, 100, 15, self.update_max_interval)
         random_interval_layout.addLayout(min_max_layout)
         interval_layout.addLayout(random_interval_layout)
         
@@ -244,13 +453,7 @@ class MainWindow(QMainWindow):
         count_layout.setSpacing(2)
         
         fixed_count_layout = QHBoxLayout()
-        fixed_count_layout.addWidget(QLabel("Fixed:"))
-        self.count_spin = QSpinBox()
-        self.count_spin.setMinimum(1)
-        self.count_spin.setMaximum(10)
-        self.count_spin.setValue(5)  # Default to 5
-        self.count_spin.valueChanged.connect(self.update_spawn_count)
-        fixed_count_layout.addWidget(self.count_spin)
+        self.count_spin = self._create_spin(fixed_count_layout, "Fixed:", 1, 10, 5, self.update_spawn_count)
         count_layout.addLayout(fixed_count_layout)
         
         random_count_layout = QHBoxLayout()
@@ -260,20 +463,8 @@ class MainWindow(QMainWindow):
         random_count_layout.addWidget(self.random_count_check)
         
         min_max_count_layout = QHBoxLayout()
-        min_max_count_layout.addWidget(QLabel("Min:"))
-        self.min_count_spin = QSpinBox()
-        self.min_count_spin.setMinimum(1)
-        self.min_count_spin.setMaximum(5)
-        self.min_count_spin.setValue(1)
-        self.min_count_spin.valueChanged.connect(self.update_min_count)
-        min_max_count_layout.addWidget(self.min_count_spin)
-        
-        min_max_count_layout.addWidget(QLabel("Max:"))
-        self.max_count_spin = QSpinBox()
-        self.max_count_spin.setMinimum(1)
-        self.max_count_spin.setMaximum(10)
-        self.max_count_spin.setValue(6)  # Default to 6
-        min_max_count_layout.addWidget(self.max_count_spin)
+        self.min_count_spin = self._create_spin(min_max_count_layout, "Min:", 1, 5, 1, self.update_min_count)
+        self.max_count_spin = self._create_spin(min_max_count_layout, "Max:", 1, 10, 6)
         random_count_layout.addLayout(min_max_count_layout)
         count_layout.addLayout(random_count_layout)
         
@@ -282,66 +473,60 @@ class MainWindow(QMainWindow):
         
         layout.addLayout(basic_layout)
         
-        # Vehicle type distribution
-        type_group = QGroupBox("Vehicle Type Distribution")
-        type_layout = QVBoxLayout()
-        type_layout.setSpacing(2)
+        # Vehicle type and route distributions
+        self.type_sliders = self._create_distribution_group(
+            layout, "Vehicle Type Distribution", self.sim_thread.vehicle_types,
+            self.update_vehicle_type_distribution, self._commit_vehicle_type)
+        self.route_sliders = self._create_distribution_group(
+            layout, "Route Distribution", self.sim_thread.route_weights,
+            self.update_route_distribution, self._commit_route)
         
-        self.type_sliders = {}
-        for vehicle_type, percentage in self.sim_thread.vehicle_types.items():
-            slider_layout = QHBoxLayout()
-            slider_layout.addWidget(QLabel(f"{vehicle_type}:"))
-            
-            slider = QSlider(Qt.Horizontal)
-            slider.setMinimum(0)
-            slider.setMaximum(100)
-            slider.setValue(percentage)
-            slider.valueChanged.connect(lambda v, t=vehicle_type: self.update_vehicle_type_distribution(t, v))
-            self.type_sliders[vehicle_type] = slider
-            slider_layout.addWidget(slider)
-            
-            label = QLabel(f"{percentage}%")
-            slider_layout.addWidget(label)
-            self.type_sliders[f"{vehicle_type}_label"] = label
-            
-            type_layout.addLayout(slider_layout)
-        
-        type_group.setLayout(type_layout)
-        layout.addWidget(type_group)
+        group.setLayout(layout)
+        parent_layout.addWidget(group)
         
-        # Route distribution
-        route_group = QGroupBox("Route Distribution")
-        route_layout = QVBoxLayout()
-        route_layout.setSpacing(2)
+        # Set N-S Dominant as default after all UI elements are created
+        self.preset_buttons[4].setChecked(True)  # Index 4 is N-S Dominant
+        self.apply_distribution_preset(5)  # Apply N-S Dominant preset
+    
+    def _create_spin(self, layout, label, minimum, maximum, value, on_change=None):
+        """Labelled spin box added to layout"""
+        layout.addWidget(QLabel(label))
+        spin = QSpinBox()
+        spin.setRange(minimum, maximum)
+        spin.setValue(value)
+        if on_change is not None:
+            spin.valueChanged.connect(on_change)
+        layout.addWidget(spin)
+        return spin
+    
+    def _create_distribution_group(self, parent_layout, title, values, on_change, on_release):
+        """Group with a 0-100 slider and percentage label per key, returned as {key: slider, f"{key}_label": label}"""
+        group = QGroupBox(title)
+        layout = QVBoxLayout()
+        layout.setSpacing(2)
         
-        self.route_sliders = {}
-        for route, weight in self.sim_thread.route_weights.items():
+        sliders = {}
+        for key, value in values.items():
             slider_layout = QHBoxLayout()
-            slider_layout.addWidget(QLabel(f"{route}:"))
+            slider_layout.addWidget(QLabel(f"{key}:"))
             
             slider = QSlider(Qt.Horizontal)
-            slider.setMinimum(0)
-            slider.setMaximum(100)
-            slider.setValue(weight)
-            slider.valueChanged.connect(lambda v, r=route: self.update_route_distribution(r, v))
-            self.route_sliders[route] = slider
+            slider.setRange(0, 100)
+            slider.setValue(value)
+            slider.valueChanged.connect(partial(on_change, key))
+            slider.sliderReleased.connect(partial(on_release, key))
+            sliders[key] = slider
             slider_layout.addWidget(slider)
             
-            label = QLabel(f"{weight}%")
+            label = QLabel(f"{value}%")
             slider_layout.addWidget(label)
-            self.route_sliders[f"{route}_label"] = label
+            sliders[f"{key}_label"] = label
             
-            route_layout.addLayout(slider_layout)
-        
-        route_group.setLayout(route_layout)
-        layout.addWidget(route_group)
+            layout.addLayout(slider_layout)
         
         group.setLayout(layout)
         parent_layout.addWidget(group)
-        
-        # Set N-S Dominant as default after all UI elements are created
-        self.preset_buttons[4].setChecked(True)  # Index 4 is N-S Dominant
-        self.apply_distribution_preset(5)  # Apply N-S Dominant preset
+        return sliders
     
     def create_vehicle_panel(self, parent_layout):
         group = QGroupBox("Add Vehicle")
@@ -425,6 +610,7 @@ class MainWindow(QMainWindow):
         main_stats_layout = QHBoxLayout()
         
         # Create statistics for each direction
+        self._dir_labels = {}
         for direction in ["North", "South", "East", "West"]:
             direction_layout = QVBoxLayout()
             direction_layout.addWidget(QLabel(direction))
@@ -440,6 +626,7 @@ class MainWindow(QMainWindow):
             setattr(self, f"{direction.lower()}_count", count_label)
             setattr(self, f"{direction.lower()}_queue", queue_label)
             setattr(self, f"{direction.lower()}_speed", speed_label)
+            self._dir_labels[direction.lower()] = (count_label, queue_label, speed_label)
             
             main_stats_layout.addLayout(direction_layout)
         
@@ -488,12 +675,14 @@ class MainWindow(QMainWindow):
         row_labels = ["Global", "N2TL", "S2TL", "E2TL", "W2TL"]
         self.stats_table.setVerticalHeaderLabels(row_labels)
         
-        # Initialize cells
+        # Initialize cells, the items are kept so updates do not have to look them up
+        self._stats_items = [[None] * 14 for _ in range(5)]
         for row in range(5):
             for col in range(14):
                 item = QTableWidgetItem("0")
                 item.setTextAlignment(Qt.AlignCenter)
                 self.stats_table.setItem(row, col, item)
+                self._stats_items[row][col] = item
         
         # Set column widths
         self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
@@ -522,36 +711,71 @@ class MainWindow(QMainWindow):
             self.start_button.setText("Start Simulation")
             self.status_label.setText("Status: Stopped")
     
+    def _pull_state(self):
+        state = self.sim_thread.take_latest_state()
+        if state is None:
+            return
+        self.update_step(state['step'])
+        self.update_vehicles(state['vehicles'])
+        self.update_statistics(state['stats'])
+        self._record_cumulative(state['plot_values'], None, state['stats_text'])
+        # Pulled state is already one update per UI tick, paint it now
+        self._flush_stats()
+    
     def update_speed(self, value):
         self.sim_thread.speed = value
     
     def update_step(self, step):
-        self.step_label.setText(f"Steps: {step}")
+        # Several updates can carry the same step, only a new value is worth a relayout
+        if step != self._last_step_shown:
+            self._last_step_shown = step
+            self.step_label.setText(f"Steps: {step}")
     
     def update_vehicles(self, vehicles):
-        self.vehicle_table.setRowCount(len(vehicles))
-        for row, (vid, data) in enumerate(vehicles.items()):
-            self.vehicle_table.setItem(row, 0, QTableWidgetItem(vid))
-            self.vehicle_table.setItem(row, 1, QTableWidgetItem(data.get('type', 'standard_car')))
-            self.vehicle_table.setItem(row, 2, QTableWidgetItem(data['route']))
-            self.vehicle_table.setItem(row, 3, QTableWidgetItem(data['road']))
-            self.vehicle_table.setItem(row, 4, QTableWidgetItem(str(data['lane'])))
-            self.vehicle_table.setItem(row, 5, QTableWidgetItem(str(data['speed'])))
-            self.vehicle_table.setItem(row, 6, QTableWidgetItem(str(data['waiting'])))
+        n = len(vehicles)
+        # Sorting would move rows under us on every cell change
+        sorting = self.vehicle_table.isSortingEnabled()
+        self.vehicle_table.setSortingEnabled(False)
+        self.vehicle_table.setUpdatesEnabled(False)
+        self.vehicle_table.blockSignals(True)
+        try:
+            # Only create items for rows that never existed, existing ones are updated in place
+            self.vehicle_table.setRowCount(n)
+            for row in range(len(self._vehicle_items), n):
+                items = [QTableWidgetItem("") for _ in range(7)]
+                for col, item in enumerate(items):
+                    self.vehicle_table.setItem(row, col, item)
+                self._vehicle_items.append(items)
+            # Rows removed by setRowCount delete their items
+            del self._vehicle_items[n:]
+            
+            for items, (vid, data) in zip(self._vehicle_items, vehicles.items()):
+                items[0].setText(vid)
+                items[1].setText(data.get('type', 'standard_car'))
+                items[2].setText(data['route'])
+                items[3].setText(data['road'])
+                # Numbers are stored as they are, Qt displays them and sorts them numerically
+                items[4].setData(Qt.DisplayRole, data['lane'])
+                items[5].setData(Qt.DisplayRole, data['speed'])
+                items[6].setData(Qt.DisplayRole, data['waiting'])
+        finally:
+            self.vehicle_table.blockSignals(False)
+            self.vehicle_table.setUpdatesEnabled(True)
+            self.vehicle_table.setSortingEnabled(sorting)
+            self.vehicle_table.viewport().update()
     
     def update_statistics(self, stats):
-        for direction in ["north", "south", "east", "west"]:
+        for direction, (count_label, queue_label, speed_label) in self._dir_labels.items():
             if direction in stats:
-                getattr(self, f"{direction}_count").setText(f"Count: {stats[direction]['count']}")
-                getattr(self, f"{direction}_queue").setText(f"Queue: {stats[direction]['queue']}")
-                getattr(self, f"{direction}_speed").setText(f"Speed: {stats[direction]['speed']:.1f} m/s")
+                direction_stats = stats[direction]
+                count_label.setText(f"Count: {direction_stats['count']}")
+                queue_label.setText(f"Queue: {direction_stats['queue']}")
+                speed_label.setText(f"Speed: {direction_stats['speed']:.1f} m/s")
         
         if 'light_phase' in stats:
-            phase_names = ["NS Green", "NS Yellow", "NSL Green", "NSL Yellow", 
-                          "EW Green", "EW Yellow", "EWL Green", "EWL Yellow"]
             phase = stats['light_phase']
-            if 0 <= phase < len(phase_names):
-                self.light_phase_label.setText(f"Phase: {phase_names[phase]}")
+            if 0 <= phase < len(_PHASE_LABELS):
+                self.light_phase_label.setText(_PHASE_LABELS[phase])
             else:
                 self.light_phase_label.setText(f"Phase: {phase}")
     
@@ -565,29 +789,41 @@ class MainWindow(QMainWindow):
             speed = float(self.speed_input.text())
             lane = self.lane_combo.currentText()
             
-            vehicle_id = f"{vehicle_type}_{route}_{self.vehicle_counter}"
-            self.vehicle_counter += 1
-        
-            traci.vehicle.add(
-                vehID=vehicle_id,
-                routeID=route,
-                typeID=vehicle_type,
-                departLane=lane,
-                departSpeed=str(speed)
-            )
+            self._add_vehicle_direct(route, vehicle_type, speed, lane)
         except Exception as e:
             print(f"Error adding vehicle: {e}")
     
+    def _add_vehicle_direct(self, route, vehicle_type, speed, lane):
+        """Add one vehicle to SUMO without going through the input widgets"""
+        vehicle_id = f"{vehicle_type}_{route}_{self.vehicle_counter}"
+        self.vehicle_counter += 1
+        
+        traci.vehicle.add(
+            vehID=vehicle_id,
+            routeID=route,
+            typeID=vehicle_type,
+            departLane=lane,
+            departSpeed=str(speed)
+        )
+    
     def add_random_vehicles(self):
         if not self.sim_thread.running:
             return
         
-        for _ in range(5):
-            self.route_combo.setCurrentIndex(random.randint(0, self.route_combo.count()-1))
-            self.vehicle_type_combo.setCurrentIndex(random.randint(0, self.vehicle_type_combo.count()-1))
-            self.speed_input.setText(str(random.uniform(5, 15)))
-            self.lane_combo.setCurrentIndex(random.randint(0, self.lane_combo.count()-1))
-            self.add_vehicle()
+        # Draw every choice at once and read the combo texts directly, so no widget changes or signals
+        count = 5
+        routes = np.random.randint(0, self.route_combo.count(), count).tolist()
+        types = np.random.randint(0, self.vehicle_type_combo.count(), count).tolist()
+        speeds = np.random.uniform(5, 15, count).tolist()
+        lanes = np.random.randint(0, self.lane_combo.count(), count).tolist()
+        for route, vehicle_type, speed, lane in zip(routes, types, speeds, lanes):
+            try:
+                self._add_vehicle_direct(self.route_combo.itemText(route),
+                                         self.vehicle_type_combo.itemText(vehicle_type),
+                                         speed,
+                                         self.lane_combo.itemText(lane))
+            except Exception as e:
+                print(f"Error adding vehicle: {e}")
     
     def remove_vehicle(self):
         if not self.sim_thread.running:
@@ -605,11 +841,20 @@ class MainWindow(QMainWindow):
         if not self.sim_thread.running:
             return
         
+        # Removed by the simulation thread so the GUI thread does not wait on SUMO
+        self.sim_thread.request_remove_all()
+    
+    def get_view_bounds(self):
+        """Visible area of the SUMO GUI view as (xmin, xmax, ymin, ymax), None without a GUI"""
+        if not self._has_gui_view:
+            return None
         try:
-            for vid in traci.vehicle.getIDList():
-                traci.vehicle.remove(vid)
-        except Exception as e:
-            print(f"Error removing vehicles: {e}")
+            (xmin, ymin), (xmax, ymax) = traci.gui.getBoundary("View #0")
+        except Exception:
+            # headless SUMO over the TraCI socket, don't pay the failing round trip again
+            self._has_gui_view = False
+            return None
+        return xmin, xmax, ymin, ymax
     
     def highlight_vehicle(self):
         if not self.sim_thread.running:
@@ -620,8 +865,10 @@ class MainWindow(QMainWindow):
             vehicle_id = self.vehicle_table.item(selected[0].row(), 0).text()
             try:
                 traci.vehicle.setColor(vehicle_id, (255, 255, 0, 255))
-                traci.gui.trackVehicle("View #0", vehicle_id)
-                traci.gui.setZoom("View #0", 3000)
+                # libsumo has no GUI view to follow the vehicle in
+                if not USE_LIBSUMO:
+                    traci.gui.trackVehicle("View #0", vehicle_id)
+                    traci.gui.setZoom("View #0", 3000)
             except Exception as e:
                 print(f"Error highlighting vehicle: {e}")
     
@@ -674,205 +921,60 @@ class MainWindow(QMainWindow):
             self.min_count_spin.setValue(value)
     
     def update_vehicle_type_distribution(self, vehicle_type, value):
-        self.sim_thread.vehicle_types[vehicle_type] = value
         self.type_sliders[f"{vehicle_type}_label"].setText(f"{value}%")
+        # While dragging only the label follows, the value is handed over on release
+        if not self.type_sliders[vehicle_type].isSliderDown():
+            self._commit_vehicle_type(vehicle_type)
+    
+    def _commit_vehicle_type(self, vehicle_type):
+        self.sim_thread.vehicle_types[vehicle_type] = self.type_sliders[vehicle_type].value()
     
     def update_route_distribution(self, route, value):
-        self.sim_thread.route_weights[route] = value
         self.route_sliders[f"{route}_label"].setText(f"{value}%")
+        if not self.route_sliders[route].isSliderDown():
+            self._commit_route(route)
+    
+    def _commit_route(self, route):
+        self.sim_thread.route_weights[route] = self.route_sliders[route].value()
 
     def toggle_render_mode(self, state):
+        mode = bool(state)
+        if mode == self._last_render_mode:
+            return
         try:
-            if state:
-                # Switch to simple shapes
-                view_file = os.path.join('intersection', 'view.xml')
-                with open(view_file, 'w') as f:
-                    f.write("""<?xml version="1.0" encoding="UTF-8"?>
-<viewsettings>
-    <scheme name="standard"/>
-    <delay value="20"/>
-    <vehicleMode value="0"/>
-    <vehicleQuality value="0"/>
-    <vehicleName value="0"/>
-    <vehicleSize value="1.0"/>
-    <vehicleNameShow value="0"/>
-    <vehicleNameSize value="50"/>
-    <vehicleNameColor value="0,0,0"/>
-    <vehicleNameBackground value="0"/>
-    <vehicleNameBackgroundColor value="255,255,255"/>
-    <vehicleNameBackgroundAlpha value="0.5"/>
-    <vehicleNameBackgroundSize value="0.5"/>
-    <vehicleNameBackgroundOffset value="0.0"/>
-    <vehicleNameBackgroundRotation value="0.0"/>
-    <vehicleNameBackgroundScale value="1.0"/>
-    <minGap value="0.5"/>
-</viewsettings>""")
-            else:
-                # Switch to real world rendering
-                view_file = os.path.join('intersection', 'view.xml')
-                with open(view_file, 'w') as f:
-                    f.write("""<?xml version="1.0" encoding="UTF-8"?>
-<viewsettings>
-    <scheme name="real world"/>
-    <delay value="20"/>
-    <vehicleMode value="9"/>
-    <vehicleQuality value="3"/>
-    <vehicleName value="0"/>
-    <vehicleSize value="1.0"/>
-    <vehicleNameShow value="0"/>
-    <vehicleNameSize value="50"/>
-    <vehicleNameColor value="0,0,0"/>
-    <vehicleNameBackground value="0"/>
-    <vehicleNameBackgroundColor value="255,255,255"/>
-    <vehicleNameBackgroundAlpha value="0.5"/>
-    <vehicleNameBackgroundSize value="0.5"/>
-    <vehicleNameBackgroundOffset value="0.0"/>
-    <vehicleNameBackgroundRotation value="0.0"/>
-    <vehicleNameBackgroundScale value="1.0"/>
-    <minGap value="2.5"/>
-</viewsettings>""")            
+            # Simple shapes or real world rendering, written atomically through a temporary file
+            view_file = os.path.join('intersection', 'view.xml')
+            tmp_file = view_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(_SIMPLE_VIEW_XML if mode else _REAL_VIEW_XML)
+            os.replace(tmp_file, view_file)
+            self._last_render_mode = mode
             print("Render mode toggled: ", state)
             
         except Exception as e:
             print(f"Error toggling render mode: {e}")
 
+    def _on_preset_clicked(self, preset_num, checked):
+        if checked:
+            self.apply_distribution_preset(preset_num)
+    
     def apply_distribution_preset(self, preset_num):
-        if preset_num == 1:  # Urban Rush Hour
-            # More passenger cars, some buses, few trucks
-            self.sim_thread.vehicle_types = {
-                "veh_passenger": 75,
-                "veh_bus": 15,
-                "veh_truck": 5,
-                "veh_emergency": 3,
-                "veh_motorcycle": 2
-            }
-            # More traffic on main roads
-            self.sim_thread.route_weights = {
-                "W_N": 12, "W_E": 15, "W_S": 8,
-                "N_W": 8, "N_E": 15, "N_S": 12,
-                "E_N": 15, "E_S": 8, "E_W": 12,
-                "S_N": 8, "S_E": 12, "S_W": 15
-            }
-        elif preset_num == 2:  # Highway Traffic
-            # More trucks, fewer passenger cars
-            self.sim_thread.vehicle_types = {
-                "veh_passenger": 45,
-                "veh_bus": 10,
-                "veh_truck": 35,
-                "veh_emergency": 5,
-                "veh_motorcycle": 5
-            }
-            # More through traffic
-            self.sim_thread.route_weights = {
-                "W_N": 10, "W_E": 20, "W_S": 10,
-                "N_W": 10, "N_E": 20, "N_S": 10,
-                "E_N": 10, "E_S": 20, "E_W": 10,
-                "S_N": 10, "S_E": 20, "S_W": 10
-            }
-        elif preset_num == 3:  # Mixed Traffic
-            # Even distribution of vehicle types
-            self.sim_thread.vehicle_types = {
-                "veh_passenger": 40,
-                "veh_bus": 20,
-                "veh_truck": 20,
-                "veh_emergency": 10,
-                "veh_motorcycle": 10
-            }
-            # Even distribution of routes
-            self.sim_thread.route_weights = {
-                "W_N": 8, "W_E": 8, "W_S": 8,
-                "N_W": 8, "N_E": 8, "N_S": 8,
-                "E_N": 8, "E_S": 8, "E_W": 8,
-                "S_N": 8, "S_E": 8, "S_W": 8
-            }
-        elif preset_num == 4:  # Emergency Heavy
-            # More emergency vehicles
-            self.sim_thread.vehicle_types = {
-                "veh_passenger": 30,
-                "veh_bus": 10,
-                "veh_truck": 10,
-                "veh_emergency": 40,
-                "veh_motorcycle": 10
-            }
-            # More traffic on emergency routes
-            self.sim_thread.route_weights = {
-                "W_N": 15, "W_E": 5, "W_S": 15,
-                "N_W": 5, "N_E": 15, "N_S": 5,
-                "E_N": 15, "E_S": 5, "E_W": 15,
-                "S_N": 5, "S_E": 15, "S_W": 5
-            }
-        elif preset_num == 5:  # North-South Dominant
-            # High passenger and motorcycle, low truck
-            self.sim_thread.vehicle_types = {
-                "veh_passenger": 45,
-                "veh_bus": 10,
-                "veh_truck": 2,
-                "veh_emergency": 3,
-                "veh_motorcycle": 40
-            }
-            # Heavy N-S traffic
-            self.sim_thread.route_weights = {
-                "W_N": 5, "W_E": 10, "W_S": 5,
-                "N_W": 15, "N_E": 5, "N_S": 15,
-                "E_N": 15, "E_S": 5, "E_W": 10,
-                "S_N": 15, "S_E": 5, "S_W": 5
-            }
-        elif preset_num == 6:  # East-West Dominant
-            # More passenger than motorcycle
-            self.sim_thread.vehicle_types = {
-                "veh_passenger": 55,
-                "veh_bus": 12,
-                "veh_truck": 1,
-                "veh_emergency": 2,
-                "veh_motorcycle": 30
-            }
-            # Heavy E-W traffic
-            self.sim_thread.route_weights = {
-                "W_N": 10, "W_E": 15, "W_S": 10,
-                "N_W": 5, "N_E": 15, "N_S": 5,
-                "E_N": 5, "E_S": 15, "E_W": 15,
-                "S_N": 5, "S_E": 15, "S_W": 5
-            }
-        elif preset_num == 7:  # Diagonal Dominant
-            # Equal passenger and motorcycle
-            self.sim_thread.vehicle_types = {
-                "veh_passenger": 40,
-                "veh_bus": 8,
-                "veh_truck": 2,
-                "veh_emergency": 5,
-                "veh_motorcycle": 45
-            }
-            # Heavy diagonal traffic
-            self.sim_thread.route_weights = {
-                "W_N": 15, "W_E": 5, "W_S": 5,
-                "N_W": 5, "N_E": 15, "N_S": 5,
-                "E_N": 5, "E_S": 15, "E_W": 5,
-                "S_N": 5, "S_E": 5, "S_W": 15
-            }
-        elif preset_num == 8:  # Circular Flow
-            # More motorcycle than passenger
-            self.sim_thread.vehicle_types = {
-                "veh_passenger": 35,
-                "veh_bus": 7,
-                "veh_truck": 1,
-                "veh_emergency": 2,
-                "veh_motorcycle": 55
-            }
-            # Circular traffic pattern
-            self.sim_thread.route_weights = {
-                "W_N": 15, "W_E": 5, "W_S": 5,
-                "N_W": 5, "N_E": 15, "N_S": 5,
-                "E_N": 5, "E_S": 15, "E_W": 5,
-                "S_N": 5, "S_E": 5, "S_W": 15
-            }
-        
-        # Update the UI sliders
-        for vehicle_type, percentage in self.sim_thread.vehicle_types.items():
+        # The presets are read-only, the simulation thread gets copies the sliders can change
+        vehicle_types, route_weights = DISTRIBUTION_PRESETS[preset_num - 1]
+        self.sim_thread.vehicle_types = dict(vehicle_types)
+        self.sim_thread.route_weights = dict(route_weights)
+        
+        # Update the UI sliders, with their signals blocked since the simulation already has the values
+        for vehicle_type, percentage in vehicle_types.items():
+            blocker = QSignalBlocker(self.type_sliders[vehicle_type])
             self.type_sliders[vehicle_type].setValue(percentage)
+            blocker.unblock()
             self.type_sliders[f"{vehicle_type}_label"].setText(f"{percentage}%")
         
-        for route, weight in self.sim_thread.route_weights.items():
+        for route, weight in route_weights.items():
+            blocker = QSignalBlocker(self.route_sliders[route])
             self.route_sliders[route].setValue(weight)
+            blocker.unblock()
             self.route_sliders[f"{route}_label"].setText(f"{weight}%")
 
     def toggle_auto_spawn_panel(self):
@@ -885,126 +987,106 @@ class MainWindow(QMainWindow):
             sender.setText("Hide Auto Spawn Controls")
 
     def update_cumulative_statistics(self, stats):
-        # Update table statistics
-        self.update_table_row(0, {
-            'current': {
-                'queue': stats['total_queue'],
-                'waiting': stats['total_waiting_time'],
-                'vehicles': stats['total_vehicles'],
-                'length': stats['total_length']
-            },
-            'total': {
-                'queue': stats['total_queue'],
-                'waiting': stats['total_waiting_time'],
-                'vehicles': stats['total_vehicles'],
-                'length': stats['total_length']
-            },
-            'max': {
-                'queue': stats['max_queue'],
-                'waiting': stats['max_waiting_time']
-            },
-            'avg': {
-                'queue': stats['average_queue'],
-                'waiting': stats['average_waiting_time'],
-                'length': stats['average_length']
-            }
-        })
-        
-        # Update per-road statistics
-        for i, road_id in enumerate(['N2TL', 'S2TL', 'E2TL', 'W2TL'], 1):
-            road_stats = stats['road_stats'][road_id]
-            self.update_table_row(i, {
-                'current': {
-                    'queue': road_stats['current_queue'],
-                    'waiting': road_stats['current_waiting_time'],
-                    'vehicles': road_stats['current_vehicles'],
-                    'length': road_stats['current_length']
-                },
-                'total': {
-                    'queue': road_stats['total_queue'],
-                    'waiting': road_stats['total_waiting_time'],
-                    'vehicles': road_stats['total_vehicles'],
-                    'length': road_stats['total_length']
-                },
-                'max': {
-                    'queue': road_stats['max_queue'],
-                    'waiting': road_stats['max_waiting_time']
-                },
-                'avg': {
-                    'queue': road_stats['average_queue'],
-                    'waiting': road_stats['average_waiting_time'],
-                    'length': road_stats['average_length']
-                }
-            })
-            
-            # Update plot data for each road
-            self.plot_data[road_id]['queue'].append(road_stats['current_queue'])
-            self.plot_data[road_id]['wait'].append(road_stats['current_waiting_time'])
-            self.plot_data[road_id]['length'].append(road_stats['current_length'])
+        # Nested statistics dict, as sent by InteractiveSimulation
+        self._record_cumulative(stats_plot_values(stats), stats, None)
+    
+    def _record_cumulative(self, plot_values, stats, texts):
+        """Record a (road, series) plot point now, the table and plots are painted by _flush_stats"""
+        self._series[:, :, self._head] = plot_values
         
         # Update steps
-        self.plot_data['steps'].append(self.sim_thread.step)
-        
-        # Keep only last 100 points for better visualization
-        max_points = 100
-        if len(self.plot_data['steps']) > max_points:
-            self.plot_data['steps'] = self.plot_data['steps'][-max_points:]
-            for road in ['N2TL', 'S2TL', 'E2TL', 'W2TL']:
-                self.plot_data[road]['queue'] = self.plot_data[road]['queue'][-max_points:]
-                self.plot_data[road]['wait'] = self.plot_data[road]['wait'][-max_points:]
-                self.plot_data[road]['length'] = self.plot_data[road]['length'][-max_points:]
+        self._steps[self._head] = self.sim_thread.step
+        self._head = (self._head + 1) % MAX_POINTS
+        self._count = min(self._count + 1, MAX_POINTS)
+        
+        # Updates arriving faster than the paint timer are painted once, with the latest stats
+        self._pending_stats = (stats, texts)
+        if not self._paint_timer.isActive():
+            self._paint_timer.start(50)
+    
+    def _flush_stats(self):
+        self._paint_timer.stop()
+        if self._pending_stats is None:
+            return
+        stats, texts = self._pending_stats
+        self._pending_stats = None
+        
+        # Update table statistics, formatting them here only if the sender did not
+        if texts is None:
+            texts = format_stats_table(stats)
+        # One repaint for the whole table instead of one per changed cell
+        self.stats_table.setUpdatesEnabled(False)
+        self.stats_table.blockSignals(True)
+        try:
+            for row, row_texts in enumerate(texts):
+                self.update_table_row(row, row_texts)
+        finally:
+            self.stats_table.blockSignals(False)
+            self.stats_table.setUpdatesEnabled(True)
+            self.stats_table.viewport().update()
         
         try:
-            # Update plots for each road
-            for road, ax in self.axes.items():
-                ax.clear()
-                ax.plot(self.plot_data['steps'], self.plot_data[road]['queue'], 
-                       label='Queue', color='red', linewidth=2)
-                ax.plot(self.plot_data['steps'], self.plot_data[road]['wait'], 
-                       label='Wait Time', color='blue', linewidth=2)
-                ax.plot(self.plot_data['steps'], self.plot_data[road]['length'], 
-                       label='Queue Length', color='green', linewidth=2)
-                ax.set_title(f'{road} Statistics')
-                ax.set_xlabel('Simulation Steps')
-                ax.set_ylabel('Queue (veh) / Wait Time (s)')
-                ax.grid(True)
-                ax.legend()
+            # Update plots for each road, a full redraw is only needed when an axis has to rescale
+            rescaled = False
+            for road in self.axes:
+                rescaled |= self._update_plot(road)
             
-            # Use a more robust layout adjustment
-            self.figure.subplots_adjust(
-                left=0.1,
-                right=0.9,
-                top=0.95,
-                bottom=0.05,
-                hspace=0.3,
-                wspace=0.2
-            )
-            
-            self.canvas.draw()
+            if rescaled or self._bg is None:
+                self.canvas.draw_idle()
+            else:
+                self.canvas.restore_region(self._bg)
+                self._draw_lines()
+                self.canvas.blit(self.figure.bbox)
         except Exception as e:
             print(f"Error updating plots: {e}")
+    
+    def _ordered(self, buf):
+        """Oldest to newest view of a ring buffer, only copied once the buffer has wrapped"""
+        if self._count < MAX_POINTS:
+            return buf[..., :self._count]
+        return np.concatenate((buf[..., self._head:], buf[..., :self._head]), axis=-1)
+    
+    def _update_plot(self, road):
+        """Set the new data on the lines of a road, returns True when the axes had to rescale"""
+        if not self._count:
+            return False
+        steps = self._ordered(self._steps)
+        values = self._ordered(self._series[self._road_idx[road]])
+        drawn_steps, drawn_values = _decimate(steps, values)
+        for i, key in enumerate(PLOT_SERIES):
+            self._lines[road][key].set_data(drawn_steps, drawn_values[i])
+        
+        ax = self.axes[road]
+        xmin, xmax = ax.get_xlim()
+        ymin, ymax = ax.get_ylim()
+        if steps[0] < xmin or steps[-1] > xmax or values.min() < ymin or values.max() > ymax:
+            ax.relim()
+            ax.autoscale_view()
+            # Leave headroom so the next steps can still be blitted without rescaling
+            x0, x1 = ax.get_xlim()
+            ax.set_xlim(x0, x1 + 0.5 * (x1 - x0))
+            y0, y1 = ax.get_ylim()
+            ax.set_ylim(y0, y1 + 0.2 * (y1 - y0))
+            return True
+        return False
+    
+    def _draw_lines(self):
+        for road, ax in self.axes.items():
+            for line in self._lines[road].values():
+                ax.draw_artist(line)
+    
+    def _on_canvas_draw(self, event):
+        """Cache the freshly drawn background and draw the animated lines on top of it"""
+        self._bg = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
 
-    def update_table_row(self, row, stats):
-        # Current stats
-        self.stats_table.item(row, 1).setText(f"{stats['current']['queue']}")
-        self.stats_table.item(row, 2).setText(f"{stats['current']['waiting']:.1f}s")
-        self.stats_table.item(row, 3).setText(f"{stats['current']['vehicles']}")
-        self.stats_table.item(row, 4).setText(f"{stats['current']['length']:.1f}m")
-        
-        # Total stats
-        self.stats_table.item(row, 5).setText(f"{stats['total']['queue']}")
-        self.stats_table.item(row, 6).setText(f"{stats['total']['waiting']:.1f}s")
-        self.stats_table.item(row, 7).setText(f"{stats['total']['vehicles']}")
-        self.stats_table.item(row, 8).setText(f"{stats['total']['length']:.1f}m")
-        
-        # Max stats
-        self.stats_table.item(row, 9).setText(f"{stats['max']['queue']}")
-        self.stats_table.item(row, 10).setText(f"{stats['max']['waiting']:.1f}s")
-        
-        # Average stats
-        self.stats_table.item(row, 11).setText(f"{stats['avg']['queue']:.1f}")
-        self.stats_table.item(row, 12).setText(f"{stats['avg']['waiting']:.1f}s")
-        self.stats_table.item(row, 13).setText(f"{stats['avg']['length']:.1f}m")
+    def update_table_row(self, row, texts):
+        # Only touch the cells whose text changed, unchanged cells are not repainted
+        items = self._stats_items[row]
+        for col, text in enumerate(texts, 1):
+            item = items[col]
+            if item.text() != text:
+                item.setText(text)
 
 if __name__ == "__main__":
     # Initialize SUMO
@@ -1012,7 +1094,7 @@ if __name__ == "__main__":
         sys.exit("Please declare environment variable 'SUMO_HOME'")
     
     # Set up SUMO command
-    sumo_binary = checkBinary('sumo-gui')
+    sumo_binary = checkBinary('sumo' if USE_LIBSUMO else 'sumo-gui')
     sumo_cmd = [sumo_binary, 
                 '-c', 'intersection/sumo_config_interactive.sumocfg',
                 '--no-step-log', 'true',
@@ -3,7 +3,8 @@ os.environ['TF_CPP_MIN_LOG_LEVEL']='2'  # kill warning about tensorflow
 import tensorflow as tf
 import numpy as np
 import sys
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 from tensorflow import keras
 from tensorflow.keras import layers
@@ -13,17 +14,91 @@ from tensorflow.keras.utils import plot_model
 from tensorflow.keras.models import load_model
 
 
+def _make_predict_fn(model, input_dim):
+    """
+    Graph-compiled forward pass for a batch of states, avoids the per-call overhead of model.predict
+    """
+    return tf.function(lambda states: model(states, training=False),
+                       input_signature=[tf.TensorSpec([None, input_dim], tf.float32)])
+
+
+def _make_tflite_predict_fn(model, input_dim):
+    """
+    Forward pass through a TFLite copy of the model with int8 quantized weights, for inference only
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    interpreter = tf.lite.Interpreter(model_content=converter.convert())
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+    interpreter.resize_tensor_input(input_index, [1, input_dim])
+    interpreter.allocate_tensors()
+    batch = 1
+
+    def predict(states):
+        nonlocal batch
+        # The interpreter has fixed shapes, only reallocate when the batch size changes
+        if states.shape[0] != batch:
+            batch = states.shape[0]
+            interpreter.resize_tensor_input(input_index, [batch, input_dim])
+            interpreter.allocate_tensors()
+        interpreter.set_tensor(input_index, states)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)
+
+    return predict
+
+
+class _GrowArr:
+    """
+    Append-only float32 array that doubles its buffer when full
+    """
+    __slots__ = ('buf', 'n')
+
+    def __init__(self, capacity=64):
+        self.buf = np.empty(capacity, dtype=np.float32)
+        self.n = 0
+
+    def push(self, value):
+        if self.n == self.buf.size:
+            grown = np.empty(self.buf.size * 2, dtype=np.float32)
+            grown[:self.n] = self.buf
+            self.buf = grown
+        self.buf[self.n] = value
+        self.n += 1
+
+    def data(self):
+        return self.buf[:self.n]
+
+    def __len__(self):
+        return self.n
+
+
+# training metric plots written by save_model: attribute, title, y label, file name, name in the log
+_METRIC_PLOTS = (
+    ('_rewards', 'Training Rewards', 'Reward', 'rewards.png', 'Rewards'),
+    ('_delays', 'Average Delay', 'Delay (s)', 'delays.png', 'Delays'),
+    ('_queues', 'Average Queue Length', 'Queue Length', 'queues.png', 'Queue lengths'),
+)
+
+
 class TrainModel:
-    def __init__(self, num_layers, width, batch_size, learning_rate, input_dim, output_dim):
+    def __init__(self, num_layers, width, batch_size, learning_rate, input_dim, output_dim, xla_compile=False):
         self._input_dim = input_dim
         self._output_dim = output_dim
         self._batch_size = batch_size
         self._learning_rate = learning_rate
+        self._xla_compile = xla_compile  # XLA is not supported by tensorflow-metal on M1/M2 Macs
         self._model = self._build_model(num_layers, width)
+        self._predict_fn = _make_predict_fn(self._model, self._input_dim)
+        self._train_step = self._make_train_step()
+        self._in_buf = np.empty((1, self._input_dim), dtype=np.float32)  # predict_one input
         self._is_sync_training = False  # Flag to track training phase
-        self._rewards = []
-        self._delays = []
-        self._queues = []
+        self._rewards = _GrowArr()
+        self._delays = _GrowArr()
+        self._queues = _GrowArr()
+        self._metric_plots = {}  # training metric figures reused between saves
+        self._plotted_archs = {}  # architecture drawn at each model structure plot path
 
 
     def _build_model(self, num_layers, width):
@@ -47,22 +122,44 @@ class TrainModel:
         """
         Predict the action values from a single state
         """
-        state = np.reshape(state, [1, self._input_dim])
-        return self._model.predict(state)
+        # Copied into the preallocated input, which also converts it to float32
+        self._in_buf[0] = state
+        return self._predict_fn(self._in_buf).numpy()
 
 
     def predict_batch(self, states):
         """
         Predict the action values from a batch of states
         """
-        return self._model.predict(states)
+        return self._predict_fn(np.ascontiguousarray(states, dtype=np.float32)).numpy()
+
+
+    def _make_train_step(self):
+        """
+        Graph-compiled gradient step on the mean squared error, replaces the model.fit pipeline for one batch,
+        also compiled with XLA when xla_compile is set
+        """
+        model = self._model
+        optimizer = self.optimizer
+
+        @tf.function(jit_compile=self._xla_compile, input_signature=[
+            tf.TensorSpec([None, self._input_dim], tf.float32),
+            tf.TensorSpec([None, self._output_dim], tf.float32)])
+        def train_step(states, targets):
+            with tf.GradientTape() as tape:
+                loss = tf.reduce_mean(tf.square(targets - model(states, training=True)))
+            grads = tape.gradient(loss, model.trainable_variables)
+            optimizer.apply_gradients(zip(grads, model.trainable_variables))
+            return loss
+
+        return train_step
 
 
     def train_batch(self, states, q_sa):
         """
         Train the nn using the updated q-values
         """
-        self._model.fit(states, q_sa, epochs=1, verbose=0)
+        self._train_step(np.asarray(states, dtype=np.float32), np.asarray(q_sa, dtype=np.float32))
 
 
     def save_model(self, path, phase='base', model_name=None):
@@ -82,12 +179,15 @@ class TrainModel:
         self._model.save(model_path)
         print(f"Model saved to: {model_path}")
         
-        # Try to save the model plot
+        # Try to save the model plot, unless this architecture was already plotted there
         try:
             plot_path = os.path.join(path, f'model_structure_{phase}.png')
-            plot_model(self._model, to_file=plot_path, 
-                      show_shapes=True, show_layer_names=True)
-            print(f"Model structure plot saved to: {plot_path}")
+            arch_key = ','.join(str(tuple(w.shape)) for w in self._model.weights)
+            if self._plotted_archs.get(plot_path) != arch_key or not os.path.isfile(plot_path):
+                plot_model(self._model, to_file=plot_path, 
+                          show_shapes=True, show_layer_names=True)
+                self._plotted_archs[plot_path] = arch_key
+                print(f"Model structure plot saved to: {plot_path}")
         except Exception as e:
             print(f"Could not generate model plot: {str(e)}")
             print("To enable model plotting, install graphviz:")
@@ -101,43 +201,37 @@ class TrainModel:
             plots_dir = os.path.join(path, 'plots')
             os.makedirs(plots_dir, exist_ok=True)
             
-            # Plot rewards
-            if hasattr(self, '_rewards'):
-                plt.figure(figsize=(10, 6))
-                plt.plot(self._rewards)
-                plt.title('Training Rewards')
-                plt.xlabel('Episode')
-                plt.ylabel('Reward')
-                plt.savefig(os.path.join(plots_dir, 'rewards.png'))
-                plt.close()
-                print(f"Rewards plot saved to: {os.path.join(plots_dir, 'rewards.png')}")
-            
-            # Plot delays
-            if hasattr(self, '_delays'):
-                plt.figure(figsize=(10, 6))
-                plt.plot(self._delays)
-                plt.title('Average Delay')
-                plt.xlabel('Episode')
-                plt.ylabel('Delay (s)')
-                plt.savefig(os.path.join(plots_dir, 'delays.png'))
-                plt.close()
-                print(f"Delays plot saved to: {os.path.join(plots_dir, 'delays.png')}")
-            
-            # Plot queue lengths
-            if hasattr(self, '_queues'):
-                plt.figure(figsize=(10, 6))
-                plt.plot(self._queues)
-                plt.title('Average Queue Length')
-                plt.xlabel('Episode')
-                plt.ylabel('Queue Length')
-                plt.savefig(os.path.join(plots_dir, 'queues.png'))
-                plt.close()
-                print(f"Queue lengths plot saved to: {os.path.join(plots_dir, 'queues.png')}")
-                
+            # Plot rewards, delays and queue lengths
+            for attr, title, ylabel, file_name, name in _METRIC_PLOTS:
+                file_path = os.path.join(plots_dir, file_name)
+                self._save_metric_plot(attr, getattr(self, attr).data(), title, ylabel, file_path)
+                print(f"{name} plot saved to: {file_path}")
+
         except Exception as e:
             print(f"Could not generate training plots: {str(e)}")
 
 
+    def _save_metric_plot(self, key, values, title, ylabel, file_path):
+        """
+        Save one metric per episode plot, the figure is kept and only its line data is replaced on later saves
+        """
+        if key not in self._metric_plots:
+            # Not registered with pyplot, so kept figures never reach its figure manager or a GUI backend
+            fig = Figure(figsize=(10, 6))
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot()
+            line, = ax.plot([], [])
+            ax.set_title(title)
+            ax.set_xlabel('Episode')
+            ax.set_ylabel(ylabel)
+            self._metric_plots[key] = (fig, ax, line)
+        fig, ax, line = self._metric_plots[key]
+        line.set_data(np.arange(len(values)), values)
+        ax.relim()
+        ax.autoscale_view()
+        fig.savefig(file_path)
+
+
     def load_base_model(self, path):
         """
         Load the base model for sync-aware training
@@ -145,11 +239,15 @@ class TrainModel:
         if os.path.isfile(path):
             try:
                 self._model = load_model(path)
-                self._is_sync_training = True
-                # Reduce learning rate for fine-tuning
-                self._learning_rate *= 0.1
-                self.optimizer = tf.keras.optimizers.legacy.Adam(learning_rate=self._learning_rate)
+                self._predict_fn = _make_predict_fn(self._model, self._input_dim)
+                if not self._is_sync_training:
+                    # Reduce learning rate for fine-tuning, only once so repeated loads don't compound it
+                    self._learning_rate *= 0.1
+                    self.optimizer = tf.keras.optimizers.legacy.Adam(learning_rate=self._learning_rate)
+                    self._is_sync_training = True
+                # The loaded model gets the fine-tuning optimizer, reused by later loads
                 self._model.compile(loss=losses.mean_squared_error, optimizer=self.optimizer)
+                self._train_step = self._make_train_step()
                 return True
             except Exception as e:
                 print(f"Error loading model: {str(e)}")
@@ -186,22 +284,20 @@ class TrainModel:
             delay: Current episode average delay
             queue: Current episode average queue length
         """
-        if not hasattr(self, '_rewards'):
-            self._rewards = []
-        if not hasattr(self, '_delays'):
-            self._delays = []
-        if not hasattr(self, '_queues'):
-            self._queues = []
-            
-        self._rewards.append(reward)
-        self._delays.append(delay)
-        self._queues.append(queue)
+        self._rewards.push(reward)
+        self._delays.push(delay)
+        self._queues.push(queue)
 
 
 class TestModel:
-    def __init__(self, input_dim, model_path, phase=None):
+    def __init__(self, input_dim, model_path, phase=None, quantize=False):
         self._input_dim = input_dim
         self._model = self._load_my_model(model_path, phase)
+        if quantize:
+            self._predict_fn = _make_tflite_predict_fn(self._model, self._input_dim)
+        else:
+            self._predict_fn = _make_predict_fn(self._model, self._input_dim)
+        self._in_buf = np.empty((1, self._input_dim), dtype=np.float32)  # predict_one input
 
     def _load_my_model(self, model_folder_path, phase):
         """
@@ -210,39 +306,31 @@ class TestModel:
             model_folder_path: Path to the model folder
             phase: If None, load non-phase model. If specified, load phase-based model
         """
+        # Preferred file first, then the fallback with the warning printed when it is used
         if phase is None:
-            # Try to load non-phase model first
-            model_file_path = model_folder_path
-            if os.path.isfile(model_file_path):
-                return load_model(model_file_path)
+            candidates = ((model_folder_path, None),
+                          (os.path.join(model_folder_path, 'trained_model_base.h5'),
+                           "Warning: Using phase-based model as fallback"))
         else:
-            # Try to load phase-based model
-            model_file_path = os.path.join(model_folder_path, f'trained_model_{phase}.h5')
+            candidates = ((os.path.join(model_folder_path, f'trained_model_{phase}.h5'), None),
+                          (model_folder_path, "Warning: Using non-phase model as fallback"))
+        for model_file_path, warning in candidates:
             if os.path.isfile(model_file_path):
-                return load_model(model_file_path)
-        
-        # If we get here, try the other approach
-        if phase is None:
-            # If non-phase failed, try phase-based
-            model_file_path = os.path.join(model_folder_path, 'trained_model_base.h5')
-            if os.path.isfile(model_file_path):
-                print("Warning: Using phase-based model as fallback")
-                return load_model(model_file_path)
+                if warning:
+                    print(warning)
+                break
         else:
-            # If phase-based failed, try non-phase
-            if os.path.isfile(model_folder_path):
-                print("Warning: Using non-phase model as fallback")
-                return load_model(model_folder_path)
-        
-        # If all attempts fail
-        sys.exit(f"Model not found at {model_folder_path}")
+            # If all attempts fail
+            sys.exit(f"Model not found at {model_folder_path}")
+        return load_model(model_file_path)
 
     def predict_one(self, state):
         """
         Predict the action values from a single state
         """
-        state = np.reshape(state, [1, self._input_dim])
-        return self._model.predict(state)
+        # Copied into the preallocated input, which also converts it to float32
+        self._in_buf[0] = state
+        return np.asarray(self._predict_fn(self._in_buf))
 
     @property
     def input_dim(self):
@@ -4,18 +4,15 @@ from __future__ import print_function
 import os
 import sys
 import datetime
-import numpy as np
-import configparser
-import socket
 import timeit
 import traci
+import traci.constants as tc
 import argparse
-import glob
 
 from testing_simulation import Simulation
 from generator import TrafficGenerator
 from model import TestModel
-from utils import import_test_configuration, set_sumo, set_test_path
+from utils import import_test_configuration, set_sumo, set_test_path, read_server_config, iter_model_dirs
 from agent_communicator import AgentCommunicatorTesting
 from interactive_simulation import InteractiveSimulation
 
@@ -25,6 +22,22 @@ if 'SUMO_HOME' in os.environ:
 else:
     sys.exit("Please declare the environment variable 'SUMO_HOME'")
 
+# Incoming edges reported to the server, keyed by direction
+INCOMING_EDGES = (('N', 'N2TL'), ('S', 'S2TL'), ('E', 'E2TL'), ('W', 'W2TL'))
+EDGE_VARIABLES = (tc.LAST_STEP_VEHICLE_NUMBER, tc.LAST_STEP_MEAN_SPEED)
+
+def _mean(values):
+    """Mean of a short list without converting it to an array, 0 when empty"""
+    return sum(values) / len(values) if len(values) else 0
+
+def _model_file_name(agent_id, phase=None):
+    """Model file name looked up in each model folder"""
+    if phase:
+        # For phase-based models, look for trained_model_{phase}.h5
+        return f'trained_model_{phase}.h5'
+    # For non-phase models, look for intersection_agent{num}_model.h5 (e.g., 'agent1' -> '1')
+    return f"intersection_agent{agent_id.replace('agent', '')}_model.h5"
+
 def get_latest_model_for_agent(models_dir, agent_id, phase=None):
     """
     Find the latest model for a specific agent
@@ -35,86 +48,22 @@ def get_latest_model_for_agent(models_dir, agent_id, phase=None):
     Returns:
         tuple: (model_number, model_path) or (None, None) if no model found
     """
-    # Extract agent number from agent_id (e.g., 'agent1' -> '1')
-    agent_num = agent_id.replace('agent', '')
+    model_file_name = _model_file_name(agent_id, phase)
     
-    # Find all model directories
-    model_dirs = glob.glob(os.path.join(models_dir, 'model_*'))
-    if not model_dirs:
+    # Find all model directories in one directory scan, sorted by model number
+    try:
+        model_dirs = sorted(iter_model_dirs(models_dir), reverse=True)
+    except OSError:
         return None, None
     
-    # Sort directories by model number
-    model_dirs.sort(key=lambda x: int(x.split('_')[-1]), reverse=True)
-    
     # Look for the latest model that has a file for this agent
-    for model_dir in model_dirs:
-        model_num = int(model_dir.split('_')[-1])
-        if phase:
-            # For phase-based models, look for trained_model_{phase}.h5
-            model_file = os.path.join(model_dir, f'trained_model_{phase}.h5')
-        else:
-            # For non-phase models, look for intersection_agent{num}_model.h5
-            model_file = os.path.join(model_dir, f'intersection_agent{agent_num}_model.h5')
-            
-        if os.path.exists(model_file):
+    for model_num, model_dir in model_dirs:
+        model_file = os.path.join(model_dir, model_file_name)
+        if os.path.isfile(model_file):
             return model_num, model_file
     
     return None, None
 
-def read_server_config(config_file='server_config_2.ini'):
-    if not os.path.exists(config_file):
-        return None, None, None, None
-    config = configparser.ConfigParser()
-    config.read(config_file)
-    if 'server' not in config:
-        return None, None, None, None
-    if not config['server'].getboolean('enabled', fallback=False):
-        return None, None, None, None
-    server_url = config['server'].get('server_url', None)
-    agent_id = config['server'].get('agent_id', socket.gethostname())
-    # Read location data if available
-    location_data = None
-    if 'location' in config:
-        location_data = {
-            'latitude': config['location'].get('latitude', None),
-            'longitude': config['location'].get('longitude', None),
-            'intersection_name': config['location'].get('intersection_name', f'Intersection {agent_id}'),
-            'orientation': config['location'].get('orientation', '0')
-        }
-    # Read map configuration
-    map_config = {}
-    if 'map' in config:
-        map_config = {
-            'send_topology': config['map'].getboolean('send_topology', True),
-            'environment_file': config['map'].get('environment_file', 'intersection/environment.net.xml'),
-            'connection_distance': config['map'].getfloat('connection_distance', 1.5),
-            'connected_to': [x.strip() for x in config['map'].get('connected_to', '').split(',') if x.strip()]
-        }
-    else:
-        map_config = {
-            'send_topology': True,
-            'environment_file': 'intersection/environment.net.xml',
-            'connection_distance': 1.5,
-            'connected_to': []
-        }
-    # Read visualization options
-    viz_config = {}
-    if 'visualization' in config:
-        viz_config = {
-            'marker_color': config['visualization'].get('marker_color', 'green'),
-            'marker_icon': config['visualization'].get('marker_icon', 'traffic-light')
-        }
-    mapping_config = {
-        'location': location_data,
-        'map': map_config,
-        'visualization': viz_config
-    }
-    env_file_path = map_config['environment_file'] if map_config['send_topology'] else None
-    if env_file_path and not os.path.exists(env_file_path):
-        print(f"Warning: Environment file not found at {env_file_path}")
-        env_file_path = None
-    return server_url, agent_id, mapping_config, env_file_path
-
 class TestingSimulationWithServer(Simulation):
     def __init__(self, Model, TrafficGen, sumo_cmd, max_steps, green_duration, 
                  yellow_duration, num_states, num_actions, server_url=None, agent_id=None,
@@ -154,10 +103,14 @@ class TestingSimulationWithServer(Simulation):
         # Reset episode arrays
         self._reward_episode = []
         self._queue_length_episode = []
+        self._queue_sum = 0
+        self._queue_count = 0
             
         # Generate route file and start simulation
         self._TrafficGen.generate_routefile(seed=episode)
         traci.start(self._sumo_cmd)
+        if self._communicator:
+            self._subscribe()
         print("Simulating...")
 
         # Initialize simulation variables
@@ -166,6 +119,11 @@ class TestingSimulationWithServer(Simulation):
         old_total_wait = 0
         old_action = -1  # dummy init
 
+        # Bind the per-step lookups once
+        get_edge_results = traci.edge.getAllSubscriptionResults
+        get_tl_results = traci.trafficlight.getSubscriptionResults
+        VEHICLE_NUMBER, MEAN_SPEED = tc.LAST_STEP_VEHICLE_NUMBER, tc.LAST_STEP_MEAN_SPEED
+
         # Get initial sync timing if available
         if self._communicator:
             sync_data = self._communicator.get_sync_timing()
@@ -202,29 +160,20 @@ class TestingSimulationWithServer(Simulation):
 
             # Update server with state and get new sync timing
             if self._communicator:
-                # Send current state
+                # Send current state, read from the per-step subscription results
+                edge_data = get_edge_results()
+                tl_data = get_tl_results("TL")
                 self._communicator.send_state(current_state, self._step, {
                     'queue_length': self._get_queue_length(),
-                    'current_phase': traci.trafficlight.getPhase("TL"),
-                    'incoming_vehicles': {
-                        'N': traci.edge.getLastStepVehicleNumber("N2TL"),
-                        'S': traci.edge.getLastStepVehicleNumber("S2TL"),
-                        'E': traci.edge.getLastStepVehicleNumber("E2TL"),
-                        'W': traci.edge.getLastStepVehicleNumber("W2TL")
-                    },
-                    'avg_speed': {
-                        'N': traci.edge.getLastStepMeanSpeed("N2TL"),
-                        'S': traci.edge.getLastStepMeanSpeed("S2TL"),
-                        'E': traci.edge.getLastStepMeanSpeed("E2TL"),
-                        'W': traci.edge.getLastStepMeanSpeed("W2TL")
-                    }
+                    'current_phase': tl_data[tc.TL_CURRENT_PHASE],
+                    'incoming_vehicles': {d: edge_data[e][VEHICLE_NUMBER] for d, e in INCOMING_EDGES},
+                    'avg_speed': {d: edge_data[e][MEAN_SPEED] for d, e in INCOMING_EDGES}
                 })
 
-                # Get new sync timing periodically
-                if self._step % 60 == 0:  # Check for new sync timing every minute
-                    sync_data = self._communicator.get_sync_timing()
-                    if sync_data:
-                        self._adjust_timing(sync_data)
+                # Apply new sync timing polled by the background thread
+                sync_data = self._communicator.take_sync_timing()
+                if sync_data:
+                    self._adjust_timing(sync_data)
 
         # End simulation
         traci.close()
@@ -232,9 +181,9 @@ class TestingSimulationWithServer(Simulation):
 
         # Report final results to server
         if self._communicator:
-            total_reward = np.sum(self._reward_episode)
-            avg_queue_length = np.mean(self._queue_length_episode)
-            total_waiting_time = np.sum(self._queue_length_episode)
+            total_reward = sum(self._reward_episode)
+            avg_queue_length = self._queue_sum / self._queue_count if self._queue_count else 0
+            total_waiting_time = self._queue_sum
             
             self._communicator.update_episode_result(
                 episode=episode,
@@ -246,6 +195,12 @@ class TestingSimulationWithServer(Simulation):
 
         return simulation_time
 
+    def _subscribe(self):
+        """Subscribe to the reported edge and traffic light variables so each step needs one fetch"""
+        for _, edge_id in INCOMING_EDGES:
+            traci.edge.subscribe(edge_id, EDGE_VARIABLES)
+        traci.trafficlight.subscribe("TL", (tc.TL_CURRENT_PHASE,))
+
     def cleanup(self):
         """Clean up when done"""
         if self._communicator:
@@ -258,6 +213,7 @@ if __name__ == "__main__":
     parser.add_argument('--server-config', type=str, default='server_config_1.ini')
     parser.add_argument('--phase', type=str, help='Phase to use for model loading (e.g., "base", "sync"). If not specified, will use non-phase model.')
     parser.add_argument('-i', '--interactive', action='store_true', help='Run in interactive testing mode with UI')
+    parser.add_argument('--quantize', action='store_true', help='Run the model as an int8 quantized TFLite model')
     args = parser.parse_args()
     
     # Configure the test
@@ -277,10 +233,8 @@ if __name__ == "__main__":
     
     if latest_model_num is None:
         print(f"Error: No model found for agent {agent_id}")
-        if args.phase:
-            print(f"Tried to find phase-based model: trained_model_{args.phase}.h5")
-        else:
-            print(f"Tried to find non-phase model: intersection_agent{agent_id.replace('agent', '')}_model.h5")
+        kind = "phase-based" if args.phase else "non-phase"
+        print(f"Tried to find {kind} model: {_model_file_name(agent_id, args.phase)}")
         sys.exit(1)
     
     # Update config with the latest model number
@@ -311,7 +265,8 @@ if __name__ == "__main__":
     Model = TestModel(
         config['num_states'],
         model_path,
-        phase=args.phase
+        phase=args.phase,
+        quantize=args.quantize
     )
 
     if args.interactive:
@@ -328,16 +283,17 @@ if __name__ == "__main__":
             server_url,
             agent_id,
             mapping_config,
-            env_file_path
+            env_file_path,
+            batch_steps=config['batch_steps']
         )
         print("----- Testing episode (interactive)")
         simulation_time = simulation.run(config['episode_seed'])
         print("Simulation time:", simulation_time, "s")
         reward_episode = simulation.reward_episode
-        print("Average reward:", np.mean(reward_episode))
-        print("Total reward:", np.sum(reward_episode))
+        print("Average reward:", _mean(reward_episode))
+        print("Total reward:", sum(reward_episode))
         queue_length_episode = simulation.queue_length_episode
-        print("Average queue length:", np.mean(queue_length_episode))
+        print("Average queue length:", _mean(queue_length_episode))
         print("End of testing")
         simulation.cleanup()
     else:
@@ -365,9 +321,9 @@ if __name__ == "__main__":
         simulation_time = Simulation.run(config['episode_seed'])
         print("Simulation time:", simulation_time, "s")
         reward_episode = Simulation.reward_episode
-        print("Average reward:", np.mean(reward_episode))
-        print("Total reward:", np.sum(reward_episode))
+        print("Average reward:", _mean(reward_episode))
+        print("Total reward:", sum(reward_episode))
         queue_length_episode = Simulation.queue_length_episode
-        print("Average queue length:", np.mean(queue_length_episode))
+        print("Average queue length:", _mean(queue_length_episode))
         print("End of testing")
         Simulation.cleanup()
\ No newline at end of file
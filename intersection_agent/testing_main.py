@@ -3,8 +3,6 @@ from __future__ import print_function
 
 import os
 from shutil import copyfile
-import configparser
-import socket
 import argparse
 import sys
 
@@ -12,65 +10,9 @@ from testing_simulation import Simulation
 from generator import TrafficGenerator
 from model import TestModel
 from visualization import Visualization
-from utils import import_test_configuration, set_sumo, set_test_path, get_latest_model_for_agent
+from utils import import_test_configuration, set_sumo, set_test_path, get_latest_model_for_agent, read_server_config
 
 
-def read_server_config(config_file='server_config_1.ini'):
-    if not os.path.exists(config_file):
-        return None, None, None, None
-    config = configparser.ConfigParser()
-    config.read(config_file)
-    if 'server' not in config:
-        return None, None, None, None
-    if not config['server'].getboolean('enabled', fallback=False):
-        return None, None, None, None
-    server_url = config['server'].get('server_url', None)
-    agent_id = config['server'].get('agent_id', socket.gethostname())
-    # Read location data if available
-    location_data = None
-    if 'location' in config:
-        location_data = {
-            'latitude': config['location'].get('latitude', None),
-            'longitude': config['location'].get('longitude', None),
-            'intersection_name': config['location'].get('intersection_name', f'Intersection {agent_id}'),
-            'orientation': config['location'].get('orientation', '0')
-        }
-    # Read map configuration
-    map_config = {}
-    if 'map' in config:
-        map_config = {
-            'send_topology': config['map'].getboolean('send_topology', True),
-            'environment_file': config['map'].get('environment_file', 'intersection/environment.net.xml'),
-            'connection_distance': config['map'].getfloat('connection_distance', 1.5),
-            'connected_to': [x.strip() for x in config['map'].get('connected_to', '').split(',') if x.strip()]
-        }
-    else:
-        map_config = {
-            'send_topology': True,
-            'environment_file': 'intersection/environment.net.xml',
-            'connection_distance': 1.5,
-            'connected_to': []
-        }
-    # Read visualization options
-    viz_config = {}
-    if 'visualization' in config:
-        viz_config = {
-            'marker_color': config['visualization'].get('marker_color', 'green'),
-            'marker_icon': config['visualization'].get('marker_icon', 'traffic-light')
-        }
-    # Combine everything into a single mapping config
-    mapping_config = {
-        'location': location_data,
-        'map': map_config,
-        'visualization': viz_config
-    }
-    # Define the environment file path based on map config
-    env_file_path = map_config['environment_file'] if map_config['send_topology'] else None
-    if env_file_path and not os.path.exists(env_file_path):
-        print(f"Warning: Environment file not found at {env_file_path}")
-        env_file_path = None
-    return server_url, agent_id, mapping_config, env_file_path
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--server-config', type=str, default='server_config_1.ini')
@@ -30,6 +30,9 @@ class Simulation:
         self._num_actions = num_actions
         self._reward_episode = []
         self._queue_length_episode = []
+        # running totals of the queue length for the server report
+        self._queue_sum = 0
+        self._queue_count = 0
         self.server_url = server_url
         if server_url:
             self.communicator = AgentCommunicatorTesting(server_url, agent_id, mapping_config, env_file_path)
@@ -55,6 +58,8 @@ class Simulation:
             self.communicator.update_status("testing")
         self._reward_episode = []
         self._queue_length_episode = []
+        self._queue_sum = 0
+        self._queue_count = 0
         self._TrafficGen.generate_routefile(seed=episode)
         traci.start(self._sumo_cmd)
         print("Simulating...")
@@ -92,8 +97,6 @@ class Simulation:
                         'W': traci.edge.getLastStepMeanSpeed("W2TL")
                     }
                 })
-                # Force immediate sync after each state update
-                self.communicator.sync_with_server()
                 if self._step % 60 == 0:
                     sync_data = self.communicator.get_sync_timing()
                     if sync_data:
@@ -101,9 +104,9 @@ class Simulation:
         traci.close()
         simulation_time = round(timeit.default_timer() - start_time, 1)
         if self.communicator:
-            total_reward = np.sum(self._reward_episode)
-            avg_queue_length = np.mean(self._queue_length_episode) if self._queue_length_episode else 0
-            total_waiting_time = np.sum(self._queue_length_episode) if self._queue_length_episode else 0
+            total_reward = sum(self._reward_episode)
+            avg_queue_length = self._queue_sum / self._queue_count if self._queue_count else 0
+            total_waiting_time = self._queue_sum
             self.communicator.update_episode_result(
                 episode=episode,
                 reward=total_reward,
@@ -124,6 +127,8 @@ class Simulation:
             steps_todo -= 1
             queue_length = self._get_queue_length()
             self._queue_length_episode.append(queue_length)
+            self._queue_sum += queue_length
+            self._queue_count += 1
 
     def _collect_waiting_times(self):
         incoming_roads = ["E2TL", "N2TL", "W2TL", "S2TL"]
@@ -6,15 +6,13 @@ import os
 import sys
 import datetime
 import numpy as np
-import configparser
-import socket
 
 #import from outside folder
 from training_simulation import Simulation
 from generator import TrafficGenerator
 from memory import Memory
 from model import TrainModel
-from utils import import_train_configuration, set_sumo, set_train_path
+from utils import import_train_configuration, set_sumo, set_train_path, read_server_config
 from agent_communicator import AgentCommunicatorTraining
 
 
@@ -24,73 +22,6 @@ if 'SUMO_HOME' in os.environ:
 else:
     sys.exit("Please declare the environment variable 'SUMO_HOME'")
 
-def read_server_config(config_file='server_config.ini'):
-    """Read the server configuration file"""
-    if not os.path.exists(config_file):
-        return None, None, None, None
-    
-    config = configparser.ConfigParser()
-    config.read(config_file)
-    
-    if 'server' not in config:
-        return None, None, None, None
-    
-    if not config['server'].getboolean('enabled', fallback=False):
-        return None, None, None, None
-    
-    server_url = config['server'].get('server_url', None)
-    agent_id = config['server'].get('agent_id', socket.gethostname())
-    
-    # Read location data if available
-    location_data = None
-    if 'location' in config:
-        location_data = {
-            'latitude': config['location'].get('latitude', None),
-            'longitude': config['location'].get('longitude', None),
-            'intersection_name': config['location'].get('intersection_name', f'Intersection {agent_id}'),
-            'orientation': config['location'].get('orientation', '0')
-        }
-    
-    # Read map configuration
-    map_config = {}
-    if 'map' in config:
-        map_config = {
-            'send_topology': config['map'].getboolean('send_topology', True),
-            'environment_file': config['map'].get('environment_file', 'intersection/environment.net.xml'),
-            'connection_distance': config['map'].getfloat('connection_distance', 1.5),
-            'connected_to': [x.strip() for x in config['map'].get('connected_to', '').split(',') if x.strip()]
-        }
-    else:
-        map_config = {
-            'send_topology': True,
-            'environment_file': 'intersection/environment.net.xml',
-            'connection_distance': 1.5,
-            'connected_to': []
-        }
-    
-    # Read visualization options
-    viz_config = {}
-    if 'visualization' in config:
-        viz_config = {
-            'marker_color': config['visualization'].get('marker_color', 'green'),
-            'marker_icon': config['visualization'].get('marker_icon', 'traffic-light')
-        }
-    
-    # Combine everything into a single mapping config
-    mapping_config = {
-        'location': location_data,
-        'map': map_config,
-        'visualization': viz_config
-    }
-    
-    # Define the environment file path based on map config
-    env_file_path = map_config['environment_file'] if map_config['send_topology'] else None
-    if env_file_path and not os.path.exists(env_file_path):
-        print(f"Warning: Environment file not found at {env_file_path}")
-        env_file_path = None
-    
-    return server_url, agent_id, mapping_config, env_file_path
-
 if __name__ == "__main__":
     # Parse command line arguments to specify config file
     import argparse
@@ -131,7 +62,8 @@ if __name__ == "__main__":
         config['batch_size'], 
         config['learning_rate'], 
         config['num_states'], 
-        config['num_actions']
+        config['num_actions'],
+        xla_compile=config['xla_compile']
     )
 
     # Try to load base model if specified
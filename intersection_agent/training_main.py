@@ -48,7 +48,8 @@ def train_base_model(config, continue_from=None):
         config['batch_size'], 
         config['learning_rate'], 
         config['num_states'], 
-        config['num_actions']
+        config['num_actions'],
+        xla_compile=config['xla_compile']
     )
     
     # Try to load previous model if specified
@@ -1,4 +1,7 @@
 import configparser
+import copy
+import functools
+import socket
 from sumolib import checkBinary
 import os
 import sys
@@ -22,6 +25,7 @@ def import_train_configuration(config_file):
     config['batch_size'] = content['model'].getint('batch_size')
     config['learning_rate'] = content['model'].getfloat('learning_rate')
     config['training_epochs'] = content['model'].getint('training_epochs')
+    config['xla_compile'] = content['model'].getboolean('xla_compile', fallback=False)
     config['memory_size_min'] = content['memory'].getint('memory_size_min')
     config['memory_size_max'] = content['memory'].getint('memory_size_max')
     config['num_states'] = content['agent'].getint('num_states')
@@ -36,6 +40,17 @@ def import_test_configuration(config_file):
     """
     Read the config file regarding the testing and import its content
     """
+    try:
+        mtime = os.stat(config_file).st_mtime_ns
+    except OSError:
+        mtime = None
+    # callers override entries, so each gets its own copy of the cached dict
+    return dict(_parse_test_configuration(config_file, mtime))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_test_configuration(config_file, mtime):
+    """Parse a testing config, cached per (path, modification time)"""
     content = configparser.ConfigParser()
     content.read(config_file)
     config = {}
@@ -45,6 +60,7 @@ def import_test_configuration(config_file):
     config['episode_seed'] = content['simulation'].getint('episode_seed')
     config['green_duration'] = content['simulation'].getint('green_duration')
     config['yellow_duration'] = content['simulation'].getint('yellow_duration')
+    config['batch_steps'] = content['simulation'].getint('batch_steps', fallback=1)
     config['num_states'] = content['agent'].getint('num_states')
     config['num_actions'] = content['agent'].getint('num_actions')
     config['sumocfg_file_name'] = content['dir']['sumocfg_file_name']
@@ -60,15 +76,13 @@ def set_sumo(gui, sumocfg_file_name, max_steps):
     # sumo things - we need to import python modules from the $SUMO_HOME/tools directory
     if 'SUMO_HOME' in os.environ:
         tools = os.path.join(os.environ['SUMO_HOME'], 'tools')
-        sys.path.append(tools)
+        if tools not in sys.path:
+            sys.path.append(tools)
     else:
         sys.exit("please declare environment variable 'SUMO_HOME'")
 
     # setting the cmd mode or the visual mode    
-    if gui == False:
-        sumoBinary = checkBinary('sumo')
-    else:
-        sumoBinary = checkBinary('sumo-gui')
+    sumoBinary = _sumo_binary('sumo' if gui == False else 'sumo-gui')
  
     # setting the cmd command to run sumo at simulation time
     sumo_cmd = [sumoBinary, "-c", os.path.join('intersection', sumocfg_file_name), "--no-step-log", "true", "--waiting-time-memory", str(max_steps)]
@@ -76,6 +90,12 @@ def set_sumo(gui, sumocfg_file_name, max_steps):
     return sumo_cmd
 
 
+@functools.lru_cache(maxsize=None)
+def _sumo_binary(name):
+    """Locate a SUMO binary once per process"""
+    return checkBinary(name)
+
+
 def set_train_path(models_path_name):
     """
     Create a new model path with an incremental integer, also considering previously created model paths
@@ -132,22 +152,91 @@ def get_latest_model_for_agent(models_path_name, agent_id):
     models_path = os.path.join(os.getcwd(), models_path_name)
     if not os.path.exists(models_path):
         return None
-        
-    # Get all model directories
-    model_dirs = [d for d in os.listdir(models_path) if d.startswith('model_')]
-    if not model_dirs:
-        return None
-        
-    # Extract model numbers and find the latest
-    model_numbers = []
-    for d in model_dirs:
-        try:
-            # Check if this model directory contains a model for our agent
-            model_path = os.path.join(models_path, d)
-            if os.path.exists(os.path.join(model_path, f'intersection_agent{agent_id}_model.h5')):
-                num = int(d.split('_')[1])
-                model_numbers.append(num)
-        except (ValueError, IndexError):
-            continue
             
-    return max(model_numbers) if model_numbers else None
\ No newline at end of file
+    # The latest model is the highest number that contains a model for our agent
+    for num, path in sorted(iter_model_dirs(models_path), reverse=True):
+        if os.path.isfile(os.path.join(path, f'intersection_agent{agent_id}_model.h5')):
+            return num
+    return None
+
+
+def iter_model_dirs(models_path):
+    """
+    Yield (model number, path) for every model_<number> directory in models_path
+    """
+    with os.scandir(models_path) as entries:
+        for entry in entries:
+            if entry.name.startswith('model_') and entry.is_dir():
+                try:
+                    yield int(entry.name.rsplit('_', 1)[1]), entry.path
+                except ValueError:
+                    continue
+
+
+def read_server_config(config_file):
+    """
+    Read the server configuration file, returns (server_url, agent_id, mapping_config, env_file_path)
+    """
+    try:
+        mtime = os.stat(config_file).st_mtime_ns
+    except OSError:
+        return None, None, None, None
+    server_url, agent_id, mapping_config, env_file_path = _parse_server_config(config_file, mtime)
+    # callers may change the mapping, so each gets its own copy of the cached one
+    return server_url, agent_id, copy.deepcopy(mapping_config), env_file_path
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_server_config(config_file, mtime):
+    """Parse a server config, cached per (path, modification time) so an edited file is parsed again"""
+    # no interpolation: server urls may contain '%' and nothing here references other keys
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(config_file)
+    if 'server' not in config:
+        return None, None, None, None
+    if not config['server'].getboolean('enabled', fallback=False):
+        return None, None, None, None
+    server_url = config['server'].get('server_url', None)
+    agent_id = config['server'].get('agent_id', socket.gethostname())
+    # Read location data if available
+    location_data = None
+    if 'location' in config:
+        location_data = {
+            'latitude': config['location'].get('latitude', None),
+            'longitude': config['location'].get('longitude', None),
+            'intersection_name': config['location'].get('intersection_name', f'Intersection {agent_id}'),
+            'orientation': config['location'].get('orientation', '0')
+        }
+    # Read map configuration
+    map_config = {}
+    if 'map' in config:
+        map_config = {
+            'send_topology': config['map'].getboolean('send_topology', True),
+            'environment_file': config['map'].get('environment_file', 'intersection/environment.net.xml'),
+            'connection_distance': config['map'].getfloat('connection_distance', 1.5),
+            'connected_to': [x.strip() for x in config['map'].get('connected_to', '').split(',') if x.strip()]
+        }
+    else:
+        map_config = {
+            'send_topology': True,
+            'environment_file': 'intersection/environment.net.xml',
+            'connection_distance': 1.5,
+            'connected_to': []
+        }
+    # Read visualization options
+    viz_config = {}
+    if 'visualization' in config:
+        viz_config = {
+            'marker_color': config['visualization'].get('marker_color', 'green'),
+            'marker_icon': config['visualization'].get('marker_icon', 'traffic-light')
+        }
+    mapping_config = {
+        'location': location_data,
+        'map': map_config,
+        'visualization': viz_config
+    }
+    env_file_path = map_config['environment_file'] if map_config['send_topology'] else None
+    if env_file_path and not os.path.exists(env_file_path):
+        print(f"Warning: Environment file not found at {env_file_path}")
+        env_file_path = None
+    return server_url, agent_id, mapping_config, env_file_path